@@ -0,0 +1,185 @@
+"""
+Stress benchmark of precursor and target deduplication.
+
+Builds long noisy material lists, similar to what the entity recognizer
+emits for long paragraphs: the same compound under many formulas,
+hydrates, name/formula variants and metals. Times
+FindSolutionReaction._clean_precursors and clean_targets against the
+previous list-based implementations, kept below for reference.
+find_solution_reaction/test/test_dedup.py checks that both keep the
+same materials in the same order.
+
+Usage (from FindSolutionReaction folder):
+    python -m benchmarks.dedup_stress [--sizes 100 1000 5000] [--repeat 3]
+"""
+import argparse
+import random
+import re
+import time
+
+from find_solution_reaction.finder import FindSolutionReaction, clean_targets
+from find_solution_reaction.material import MaterialInformation
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+CATIONS = {'Li': 1, 'Na': 1, 'K': 1, 'Mg': 2, 'Ca': 2, 'Ba': 2, 'Mn': 2, 'Fe': 3, 'Co': 2, 'Ni': 2, 'Cu': 2,
+           'Zn': 2, 'Y': 3, 'La': 3, 'Ce': 3}
+ANIONS = {'NO3': {'N': 1, 'O': 3}, 'CO3': {'C': 1, 'O': 3}, 'Cl': {'Cl': 1}, 'SO4': {'S': 1, 'O': 4},
+          'OH': {'O': 1, 'H': 1}, 'CH3COO': {'C': 2, 'H': 3, 'O': 2}}
+NAMES = {'NO3': 'nitrate', 'CO3': 'carbonate', 'Cl': 'chloride', 'SO4': 'sulfate', 'OH': 'hydroxide',
+         'CH3COO': 'acetate'}
+
+
+def _material(string, formula, elements, hydrate=0):
+    composition = [{'formula': formula, 'amount': '1',
+                    'elements': {el: str(amount) for el, amount in elements.items()}}]
+    if hydrate:
+        composition.append({'formula': 'H2O', 'amount': str(hydrate), 'elements': {'H': '2', 'O': '1'}})
+    return {'material_string': string, 'material_formula': formula, 'composition': composition,
+            'elements_vars': {}, 'amounts_vars': {}}
+
+
+def noisy_materials(n, seed=0):
+    rnd = random.Random(seed)
+    materials = []
+    while len(materials) < n:
+        cation = rnd.choice(list(CATIONS))
+        anion = rnd.choice(list(ANIONS))
+        # noisy stoichiometry gives many distinct formulas of the same compound
+        n_cation, n_anion = rnd.randint(1, 4), rnd.randint(1, 6)
+        formula = '%s%s(%s)%s' % (cation, n_cation if n_cation > 1 else '', anion, n_anion)
+        elements = {cation: n_cation}
+        for el, amount in ANIONS[anion].items():
+            elements[el] = elements.get(el, 0) + amount * n_anion
+
+        r = rnd.random()
+        if r < 0.1:
+            materials.append(_material(cation, cation, {cation: 1}))
+        elif r < 0.4:
+            materials.append(_material('%s %s %i' % (cation, NAMES[anion], len(materials)), formula, elements))
+        elif r < 0.6:
+            hydrate = rnd.randint(1, 9)
+            materials.append(_material('%s·%iH2O' % (formula, hydrate), formula, elements, hydrate))
+        else:
+            materials.append(_material(formula, formula, elements))
+    return materials
+
+
+def reference_clean_precursors(precursors, target):
+    n_dup_precursors = []
+    n_dup_precursors_str = []
+    precursor_en = []
+    precursor_chem = []
+    precursor_chem_species = []
+    for precursor in precursors:
+        if precursor.is_metal_or_alloy:
+            continue
+        try:
+            if precursor.material_composition[0]['formula']:
+                if precursor.material_composition[0]['formula'] not in n_dup_precursors_str:
+                    n_dup_precursors.append(precursor)
+                    n_dup_precursors_str.append(precursor.material_composition[0]['formula'])
+            else:
+                n_dup_precursors.append(precursor)
+                n_dup_precursors_str.append(precursor.material_composition[0]['formula'])
+        except Exception:
+            n_dup_precursors.append(precursor)
+    for precursor in n_dup_precursors:
+        if precursor.material_formula.replace(" ", "") != precursor.material_string.replace(" ", "").replace("@", ""):
+            precursor_en.append(precursor)
+        else:
+            precursor_chem.append(precursor)
+            precursor_chem_species.append(precursor.nh2o_elements)
+    cleaned_precursors = precursor_chem + [precursor for precursor in precursor_en if
+                                           precursor.nh2o_elements not in precursor_chem_species]
+    final_precurosr_set = []
+    precursors_common_element_valence = []
+    for precursor in cleaned_precursors:
+        precursor_common_element_dict = {}
+        common_elements = precursor.nh2o_elements & target.nh2o_elements
+        if precursor.valence_dict:
+            for common_element in common_elements:
+                precursor_common_element_dict[common_element] = precursor.valence_dict[common_element]
+            if precursor_common_element_dict not in precursors_common_element_valence:
+                precursors_common_element_valence.append(precursor_common_element_dict)
+                final_precurosr_set.append(precursor)
+        else:
+            final_precurosr_set.append(precursor)
+    return final_precurosr_set
+
+
+def reference_clean_targets(targets):
+    n_dup_targets = []
+    n_dup_targets_str = []
+    targets_en = []
+    targets_chem = []
+    targets_chem_species = []
+    targets = [target for target in targets if not re.findall(r'\(([a-z]+)\)', target.material_string)]
+    for target in targets:
+        try:
+            if target.material_composition[0]['formula']:
+                if not target.material_composition[0]['elements']:
+                    continue
+                if target.material_composition[0]['formula'] not in n_dup_targets_str:
+                    n_dup_targets.append(target)
+                    n_dup_targets_str.append(target.material_composition[0]['formula'])
+            else:
+                n_dup_targets.append(target)
+                n_dup_targets_str.append(target.material_composition[0]['formula'])
+        except Exception:
+            n_dup_targets.append(target)
+    for target in n_dup_targets:
+        if target.material_formula.replace(" ", "") != target.material_string.replace(" ", "").replace("@", ""):
+            targets_en.append(target)
+        else:
+            targets_chem.append(target)
+            targets_chem_species.append(target.nh2o_elements)
+    return targets_chem + [target for target in targets_en if target.nh2o_elements not in targets_chem_species]
+
+
+def clean_precursors(precursors, target):
+    # runs only the cleaning step of FindSolutionReaction
+    completer = FindSolutionReaction.__new__(FindSolutionReaction)
+    completer.precursors = precursors
+    completer.target = target
+    completer._clean_precursors()
+    return completer.precursors
+
+
+def _best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(sizes, repeat):
+    target = MaterialInformation('LiNi0.5Mn0.5O2', 'LiNi0.5Mn0.5O2',
+                                 [{'formula': 'LiNi0.5Mn0.5O2', 'amount': '1',
+                                   'elements': {'Li': '1', 'Ni': '0.5', 'Mn': '0.5', 'O': '2'}}])
+
+    print('%8s %22s %22s %22s %22s' % ('size', 'precursors (ref), ms', 'precursors (new), ms',
+                                       'targets (ref), ms', 'targets (new), ms'))
+    for size in sizes:
+        materials = [MaterialInformation.from_dict(m, cache=None) for m in noisy_materials(size)]
+
+        ref_p_time = _best_time(lambda: reference_clean_precursors(materials, target), repeat)
+        new_p_time = _best_time(lambda: clean_precursors(materials, target), repeat)
+        ref_t_time = _best_time(lambda: reference_clean_targets(materials), repeat)
+        new_t_time = _best_time(lambda: clean_targets(materials), repeat)
+
+        print('%8i %22.2f %22.2f %22.2f %22.2f' % (size, ref_p_time * 1e3, new_p_time * 1e3,
+                                                   ref_t_time * 1e3, new_t_time * 1e3))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
@@ -0,0 +1,72 @@
+"""
+Memory/time benchmark of MaterialInformation on a synthetic workload.
+
+Builds N materials from random compositions (without the interning
+cache), then accesses the derived element/species sets the way
+FindSolutionReaction does. Reports construction time, memory per
+object and property access time.
+
+Usage (from FindSolutionReaction folder):
+    python -m benchmarks.material_layout [--n 100000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from find_solution_reaction.material import MaterialInformation
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+CATIONS = ['Li', 'Na', 'K', 'Mg', 'Ca', 'Ba', 'Ti', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn', 'Zr', 'Ce']
+ANIONS = [{'N': '1', 'O': '3'}, {'C': '1', 'O': '3'}, {'Cl': '1'}, {'S': '1', 'O': '4'}, {'O': '1', 'H': '1'}]
+AMOUNTS = ['1', '2', '3', '0.5', '0.95', '0.05']
+
+
+def synthetic_compositions(n, seed=0):
+    rnd = random.Random(seed)
+    for i in range(n):
+        elements = {}
+        for cation in rnd.sample(CATIONS, rnd.randint(1, 3)):
+            elements[cation] = rnd.choice(AMOUNTS)
+        elements.update(rnd.choice(ANIONS))
+        composition = [{'formula': 'M%i' % i, 'amount': '1', 'elements': elements}]
+        if rnd.random() < 0.3:
+            composition.append({'formula': 'H2O', 'amount': rnd.choice(AMOUNTS),
+                                'elements': {'H': '2', 'O': '1'}})
+        yield 'M%i' % i, composition
+
+
+def run(n):
+    compositions = list(synthetic_compositions(n))
+
+    tracemalloc.start()
+    t = time.perf_counter()
+    materials = [MaterialInformation(name, name, composition) for name, composition in compositions]
+    construction_time = time.perf_counter() - t
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    target = materials[0]
+    t = time.perf_counter()
+    for material in materials:
+        _ = material.is_metal_or_alloy
+        _ = material.nh2o_elements & target.nh2o_elements
+        _ = material.all_elements_dict == target.all_elements_dict
+        _ = material.nh2o_species
+        _ = material.all_elements
+    access_time = time.perf_counter() - t
+
+    print('materials:            %i' % n)
+    print('construction:         %.2f s (%.1f us/material)' % (construction_time, construction_time / n * 1e6))
+    print('memory:               %.1f MB (%.0f B/material)' % (memory / 2 ** 20, memory / n))
+    print('properties access:    %.3f s (%.2f us/material)' % (access_time, access_time / n * 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=100000)
+    args = parser.parse_args()
+    run(args.n)
@@ -1,19 +1,120 @@
-
+import json
+import os
+from collections import namedtuple
 
 __author__ = 'Zheren Wang'
 __maintainer__ = 'Zheren Wang'
 __email__ = 'zherenwang@berkeley.edu'
 
-__all__ = ['OXIDIZING_AGENT_LIST ', 'REDUCING_AGENT_LIST', 'OXIDIZING_IONS_LIST', 'REDUCING_IONS_LIST']
-
-OXIDIZING_AGENT_LIST = ['H2S4O6', 'N2', 'NO', 'S', 'H2SO4', 'H2SO3', 'I2', 'I3', 'H2MnO4', 'V2O5', 'HNO3', 'CO(NH2)2',
-                        'S2O8', '(NH4)2S2O8', 'N2O4', 'Br2', 'MnO2', 'O2', 'O3', 'ClO2', 'HNO2', 'HBrO',
-                        'Cl2', 'HClO4', 'HIO', 'HIO3', 'HClO3', 'HBrO3', 'Mn2O3', 'H5IO6', 'HClO2', 'HClO',
-                        'HMnO4', 'PbO2', 'H2O2', 'H2S2O8', 'H2N2O2']
-REDUCING_AGENT_LIST = ['N2H4', 'N2H4·H2O', 'HN3', 'H2S2O4', 'H3PO3', 'H2SO3', 'N2O4', 'H2', 'P', 'PVP',
-                       'CH3(CH2)15N(Br)(CH3)3', 'PEG 6000', 'PEG', 'C14H14S2', 'DMF', 'C2H2O4', 'l-Cys',
-                       'L-Cysteine', 'EDTA', 'NaBH4', 'L-cysteine', 'C6H9NO', 'C3H7NO2S', 'C10H16N2O8', 'C2H5NS',
-                       'C6H12O6', 'H3PO2', 'NO', 'H2S2O6', 'HCOOH', 'H(Ac)', 'CH2O2', 'H2N2O2', 'H2O2', 'PH3']
-OXIDIZING_IONS_LIST = ['S4O6', 'S', 'SO4', 'NO', 'N2H5', 'ClO2', 'BrO', 'Cl2', 'ClO4', 'NH3OH', 'HIO', 'IO3', 'ClO3',
-                       'BrO3', 'ClO', 'MnO4', 'S2O8', 'N2O2']
-REDUCING_IONS_LIST = ['S2O4', 'PO3', 'SO3', 'C3H5O(COO)3', 'C6H5O7', 'PO2', 'NO', 'S2O6', 'COOH', 'N2O2']
+__all__ = ['OXIDIZING_AGENT_LIST', 'REDUCING_AGENT_LIST', 'OXIDIZING_IONS_LIST', 'REDUCING_IONS_LIST',
+           'OXIDIZING_AGENTS', 'REDUCING_AGENTS', 'OXIDIZING_IONS', 'REDUCING_IONS',
+           'AGENTS_FILE', 'Agents', 'load_agents', 'get_agents', 'set_agents', 'AgentFlags', 'classify_material']
+
+AGENTS_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'agents.json')
+
+
+def _read_agents(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class AgentFlags(namedtuple('AgentFlags', ['oxidizing_formula', 'reducing_formula',
+                                           'oxidizing_string', 'reducing_string',
+                                           'oxidizing_ion', 'reducing_ion'])):
+    """
+    Classification of a material as oxidizing/reducing agent: whether its
+    formula or its string is a known agent, and whether one of its non
+    H2O species is a known ion.
+    """
+    __slots__ = ()
+
+    @property
+    def oxidizer(self):
+        return self.oxidizing_formula or self.oxidizing_ion
+
+    @property
+    def reducer(self):
+        return self.reducing_formula or self.reducing_ion
+
+
+class Agents(namedtuple('Agents', ['oxidizing_agents', 'reducing_agents',
+                                   'oxidizing_ions', 'reducing_ions'])):
+    """
+    Frozensets of oxidizing/reducing agent and ion formulas, see
+    load_agents().
+    """
+    __slots__ = ()
+
+    def classify(self, material):
+        """
+        :param material: MaterialInformation to classify.
+        :return: AgentFlags
+        """
+        nh2o_species = material.nh2o_species
+        return AgentFlags(oxidizing_formula=material.material_formula in self.oxidizing_agents,
+                          reducing_formula=material.material_formula in self.reducing_agents,
+                          oxidizing_string=material.material_string in self.oxidizing_agents,
+                          reducing_string=material.material_string in self.reducing_agents,
+                          oxidizing_ion=not self.oxidizing_ions.isdisjoint(nh2o_species),
+                          reducing_ion=not self.reducing_ions.isdisjoint(nh2o_species))
+
+
+def load_agents(path=AGENTS_FILE):
+    """
+    Loads lists of oxidizing/reducing agents and ions from a JSON file
+    with keys "oxidizing_agents", "reducing_agents", "oxidizing_ions"
+    and "reducing_ions". Use set_agents() to classify materials with
+    them.
+
+    :param path: Path to the JSON file, the bundled agents.json by default.
+    :return: Agents
+    """
+    agents = _read_agents(path)
+    return Agents(*(frozenset(agents[field]) for field in Agents._fields))
+
+
+_AGENTS = _read_agents(AGENTS_FILE)
+
+# Bundled lists, not changed by set_agents()
+OXIDIZING_AGENT_LIST = _AGENTS['oxidizing_agents']
+REDUCING_AGENT_LIST = _AGENTS['reducing_agents']
+OXIDIZING_IONS_LIST = _AGENTS['oxidizing_ions']
+REDUCING_IONS_LIST = _AGENTS['reducing_ions']
+
+OXIDIZING_AGENTS = frozenset(OXIDIZING_AGENT_LIST)
+REDUCING_AGENTS = frozenset(REDUCING_AGENT_LIST)
+OXIDIZING_IONS = frozenset(OXIDIZING_IONS_LIST)
+REDUCING_IONS = frozenset(REDUCING_IONS_LIST)
+
+_BUNDLED_AGENTS = Agents(OXIDIZING_AGENTS, REDUCING_AGENTS, OXIDIZING_IONS, REDUCING_IONS)
+_agents = _BUNDLED_AGENTS
+
+
+def get_agents():
+    """
+    :return: Agents used by classify_material() and
+        MaterialInformation.agent_flags.
+    """
+    return _agents
+
+
+def set_agents(agents):
+    """
+    Replaces the agents used in this process, e.g.
+    set_agents(load_agents("my_agents.json")). Flags already computed
+    by MaterialInformation.agent_flags are recomputed on next access.
+
+    :param agents: Agents, or None for the bundled agents.json.
+    """
+    global _agents
+    _agents = agents or _BUNDLED_AGENTS
+
+
+def classify_material(material, agents=None):
+    """
+    :param material: MaterialInformation to classify.
+    :param agents: Agents, the ones from get_agents() if None.
+    :return: AgentFlags. Use MaterialInformation.agent_flags, which
+        computes them once per material.
+    """
+    return (agents or _agents).classify(material)
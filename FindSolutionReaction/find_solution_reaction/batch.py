@@ -0,0 +1,125 @@
+import collections
+import itertools
+import multiprocessing
+
+from find_solution_reaction.diagnostics import SOLVED, DUPLICATE
+from find_solution_reaction.finder import balance_recipe
+from find_solution_reaction.valence import load_valence_cache
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+__all__ = ['balance_recipes']
+
+
+def _init_worker(valence_cache_path):
+    """
+    Runs once in every worker process. Material and oxidation state caches
+    are module-level, so each worker fills its own copy.
+    """
+    if valence_cache_path:
+        load_valence_cache(valence_cache_path)
+
+
+def _failures(report):
+    return [{'material_string': record['material_string'],
+             'substitution': record['substitution'],
+             'outcome': record['outcome'],
+             'reason': record['reason']}
+            for record in report['targets'] if record['outcome'] not in (SOLVED, DUPLICATE)]
+
+
+def _balance_one(index, recipe, diagnostics):
+    precursors, targets = recipe[0], recipe[1]
+    sentences = recipe[2] if len(recipe) > 2 else None
+    result = {'index': index, 'solutions': [], 'error': None, 'failures': []}
+    if diagnostics:
+        result['diagnostics'] = None
+    try:
+        # the report is always collected, so that failed targets are not
+        # mistaken for targets without reaction
+        result['solutions'], report = balance_recipe(precursors, targets, sentences, diagnostics=True)
+        result['failures'] = _failures(report)
+        if diagnostics:
+            result['diagnostics'] = report
+    except Exception as e:
+        result['error'] = {'type': type(e).__name__, 'message': str(e)}
+    return result
+
+
+def _balance_chunk(args):
+    chunk, diagnostics = args
+    return [_balance_one(index, recipe, diagnostics) for index, recipe in chunk]
+
+
+def _chunks(iterable, chunksize):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _imap_bounded(pool, func, iterable, max_pending):
+    """
+    Like pool.imap(), but the input is only read max_pending tasks ahead
+    of the consumer, so memory stays bounded for long streams.
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def balance_recipes(recipes, workers=1, chunksize=64, valence_cache=None, diagnostics=False):
+    """
+    Balances a stream of recipes, optionally in a pool of worker processes.
+
+    Results are yielded in the order of the input, as soon as the chunk
+    holding them is finished. The input is read lazily: at most two
+    chunks per worker are in flight. A recipe that raises is reported with its
+    exception instead of being dropped, so the output has exactly one
+    record per input recipe. Targets that were not balanced are listed
+    with the reason, so a failed recipe is told apart from a recipe
+    without reaction.
+
+    :param recipes: Iterable of (precursors, targets) or
+        (precursors, targets, sentences) tuples, as accepted by
+        balance_recipe().
+    :param workers: Number of worker processes, 1 to run in this process.
+    :param chunksize: Number of recipes sent to a worker at once.
+    :param valence_cache: Optional path to a file written by
+        save_valence_cache(), loaded by every worker on start.
+    :param diagnostics: If True, every record also has "diagnostics" key
+        with the report of balance_recipe(..., diagnostics=True), None for
+        recipes that raised. Reports can be aggregated with
+        diagnostics.summarize_diagnostics().
+    :return: Generator of dictionaries {"index": position in recipes,
+        "solutions": balance_recipe() output, "error": None or
+        {"type": exception class name, "message": exception message},
+        "failures": list of {"material_string", "substitution",
+        "outcome", "reason"} of every target without solution, outcome
+        as in the diagnostics report}.
+    """
+    chunks = ((chunk, diagnostics) for chunk in _chunks(enumerate(recipes), chunksize))
+
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(valence_cache,))
+        results = _imap_bounded(pool, _balance_chunk, chunks, 2 * workers)
+    else:
+        _init_worker(valence_cache)
+        results = map(_balance_chunk, chunks)
+
+    try:
+        for chunk_results in results:
+            yield from chunk_results
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+
+class LRUCache(object):
+    def __init__(self, maxsize=None):
+        """
+        A least-recently-used cache with hit/miss statistics.
+
+        :param maxsize: Maximal number of stored items, None for unbounded.
+        :type maxsize: int
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self):
+        return list(self._data.items())
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._data), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
@@ -0,0 +1,117 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+__all__ = ['STAGES', 'SOLVED', 'DUPLICATE', 'CLEANED', 'TOO_MANY_TARGETS', 'REJECTED',
+           'stage_timer', 'summarize_diagnostics']
+
+# Stages of balancing a target, in the order they run.
+STAGES = ('conversion', 'cleaning', 'preparation', 'reaction')
+
+# Outcomes of a target that did not raise. Targets that raised get the
+# name of the exception class as outcome, e.g. "StupidRecipe".
+SOLVED = 'solved'
+DUPLICATE = 'duplicate'
+CLEANED = 'cleaned'
+TOO_MANY_TARGETS = 'too_many_targets'
+# Rejected by the element pre-filter, see prefilter.py.
+REJECTED = 'rejected'
+
+
+@contextmanager
+def stage_timer(timings, stage):
+    """
+    Adds the wall time of the with-block to timings[stage], also when the
+    block raises. Does nothing if timings is None.
+
+    :param timings: Dictionary of stage: seconds, or None.
+    :param stage: Name of the stage.
+    """
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def new_report():
+    return {'targets': [], 'precursor_errors': [], 'timings': {}}
+
+
+def target_record(target, substitution):
+    return {'material_string': target['material_string'],
+            'substitution': substitution,
+            'outcome': None,
+            'reason': None,
+            'timings': {}}
+
+
+def set_outcome(record, outcome, reason=None):
+    """
+    :param record: Target record from target_record().
+    :param outcome: One of the outcome constants, or the exception raised.
+    :param reason: Reason of the outcome, message of the exception is
+        used if outcome is an exception.
+    """
+    if isinstance(outcome, Exception):
+        record['outcome'] = type(outcome).__name__
+        record['reason'] = str(outcome)
+    else:
+        record['outcome'] = outcome
+        record['reason'] = reason
+    return record
+
+
+def finish_report(report, outcome, reason=None):
+    """
+    Gives outcome to targets that were not balanced and sums target timings
+    into the recipe timings.
+    """
+    timings = report['timings']
+    for record in report['targets']:
+        if record['outcome'] is None:
+            set_outcome(record, outcome, reason)
+        for stage, seconds in record['timings'].items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    return report
+
+
+def summarize_diagnostics(reports):
+    """
+    Aggregates reports returned by balance_recipe(..., diagnostics=True).
+
+    :param reports: Iterable of reports, None entries are skipped.
+    :return: Dictionary with number of recipes and targets, count of every
+        outcome, total seconds per stage, total seconds per stage for every
+        outcome, count of every reason per outcome and count of precursor
+        conversion errors.
+    """
+    summary = {'recipes': 0,
+               'targets': 0,
+               'outcomes': Counter(),
+               'timings': Counter(),
+               'outcome_timings': {},
+               'reasons': {},
+               'precursor_errors': Counter()}
+    for report in reports:
+        if report is None:
+            continue
+        summary['recipes'] += 1
+        summary['timings'].update(report['timings'])
+        for error in report['precursor_errors']:
+            summary['precursor_errors'][error['outcome']] += 1
+        for record in report['targets']:
+            outcome = record['outcome']
+            summary['targets'] += 1
+            summary['outcomes'][outcome] += 1
+            summary['outcome_timings'].setdefault(outcome, Counter()).update(record['timings'])
+            if record['reason'] is not None:
+                summary['reasons'].setdefault(outcome, Counter())[record['reason']] += 1
+    return summary
@@ -1,5 +1,6 @@
 import logging
 import re
+from collections import defaultdict
 from functools import reduce
 from operator import or_
 
@@ -7,10 +8,13 @@ from find_solution_reaction.material import MaterialInformation
 from find_solution_reaction.errors import (
     StupidRecipe, ExpressionPrintException,
     CannotFind, FormulaException)
+from find_solution_reaction.diagnostics import (
+    SOLVED, DUPLICATE, CLEANED, TOO_MANY_TARGETS, REJECTED,
+    stage_timer, new_report, target_record, set_outcome, finish_report)
 
 from find_solution_reaction.periodic_table import NON_VOLATILE_ELEMENTS
-from find_solution_reaction.agent import OXIDIZING_AGENT_LIST, REDUCING_AGENT_LIST, OXIDIZING_IONS_LIST, \
-    REDUCING_IONS_LIST
+from find_solution_reaction.prefilter import (
+    elements_mask, mask_elements, target_mask, precursors_mask, missing_elements_mask)
 
 
 
@@ -19,7 +23,8 @@ class FindSolutionReaction(object):
     FLOAT_ROUND = 3  # 3 decimal places 0.001
 
     def __init__(self, precursors: [MaterialInformation],
-                 target: MaterialInformation):
+                 target: MaterialInformation,
+                 timings=None):
         """
         A reaction completer that takes a set of precursors and a target,
         then calculates the possible reactions, using sympy for symbolic
@@ -28,6 +33,9 @@ class FindSolutionReaction(object):
         :type precursors: list(MaterialInformation)
         :param target: The target material.
         :type target: MaterialInformation
+        :param timings: Optional dictionary, receives seconds spent in the
+            "cleaning" and "preparation" stages.
+        :type timings: dict
         """
         self.precursors = precursors
         self.target = target
@@ -40,17 +48,19 @@ class FindSolutionReaction(object):
         self._precursors_valence_change = {}
         self._decomposition_chemicals = {}
         self._exchange_chemicals = {}
-        self._clean_precursors()
-        self._prepare_precursors()
+        with stage_timer(timings, 'cleaning'):
+            self._clean_precursors()
+        with stage_timer(timings, 'preparation'):
+            self._prepare_precursors()
 
     def _clean_precursors(self):
         # clean the duplicate precursors.
         # eg "copper nitrate" and Cu(NO3)2
         n_dup_precursors = []
-        n_dup_precursors_str = []
+        n_dup_precursors_str = set()
         precursor_en = []
         precursor_chem = []
-        precursor_chem_species = []
+        precursor_chem_species = set()
         for precursor in self.precursors:
 
             if precursor.is_metal_or_alloy:
@@ -59,11 +69,11 @@ class FindSolutionReaction(object):
                 if precursor.material_composition[0]['formula']:
                     if precursor.material_composition[0]['formula'] not in n_dup_precursors_str:
                         n_dup_precursors.append(precursor)
-                        n_dup_precursors_str.append(precursor.material_composition[0]['formula'])
+                        n_dup_precursors_str.add(precursor.material_composition[0]['formula'])
                 else:
                     n_dup_precursors.append(precursor)
-                    n_dup_precursors_str.append(precursor.material_composition[0]['formula'])
-            except:
+                    n_dup_precursors_str.add(precursor.material_composition[0]['formula'])
+            except Exception:
                 n_dup_precursors.append(precursor)
         for precursor in n_dup_precursors:
             if precursor.material_formula.replace(" ", "") != precursor.material_string.replace(" ", "").replace("@",
@@ -71,20 +81,20 @@ class FindSolutionReaction(object):
                 precursor_en.append(precursor)
             else:
                 precursor_chem.append(precursor)
-                precursor_chem_species.append(precursor.nh2o_elements)
+                precursor_chem_species.add(precursor.nh2o_elements)
         cleaned_precursors = precursor_chem + [precursor for precursor in precursor_en if
                                                precursor.nh2o_elements not in precursor_chem_species]
         ### clean some intermedia like CuO -> CuNO3
         final_precurosr_set = []
-        precursors_common_element_valence = []
+        precursors_common_element_valence = set()
         for precursor in cleaned_precursors:
-            precursor_common_element_dict = {}
             common_elements = precursor.nh2o_elements & self.target.nh2o_elements
             if precursor.valence_dict:
-                for common_element in common_elements:
-                    precursor_common_element_dict[common_element] = precursor.valence_dict[common_element]
-                if precursor_common_element_dict not in precursors_common_element_valence:
-                    precursors_common_element_valence.append(precursor_common_element_dict)
+                # hashable form of {common element: valence}
+                precursor_common_element_valence = frozenset(
+                    (common_element, precursor.valence_dict[common_element]) for common_element in common_elements)
+                if precursor_common_element_valence not in precursors_common_element_valence:
+                    precursors_common_element_valence.add(precursor_common_element_valence)
                     final_precurosr_set.append(precursor)
             else:
                 final_precurosr_set.append(precursor)
@@ -105,9 +115,9 @@ class FindSolutionReaction(object):
                 raise StupidRecipe('Precursor list contains target')
 
             if len(precursor.all_elements) == 0:
-                if precursor.material_formula in REDUCING_AGENT_LIST or precursor.material_formula in OXIDIZING_AGENT_LIST or [
-                    species for species in precursor.nh2o_species if
-                    species in OXIDIZING_IONS_LIST or species in REDUCING_IONS_LIST] or precursor.material_string in REDUCING_AGENT_LIST or precursor.material_string in REDUCING_AGENT_LIST:
+                flags = precursor.agent_flags
+                if flags.reducing_formula or flags.oxidizing_formula or flags.oxidizing_ion or flags.reducing_ion \
+                        or flags.reducing_string:
                     self._precursors_tool.append(precursor)
                 logging.debug(
                     'Skipping empty precursor %s: %s',
@@ -122,7 +132,7 @@ class FindSolutionReaction(object):
                 for element in common_elements:
                     try:
                         precursor_valence_change += self.target.valence_dict[element] - precursor.valence_dict[element]
-                    except:
+                    except Exception:
                         precursor_valence_change += 0
                 if precursor_valence_change > 0:
                     self._precursors_oxided.append(precursor.material_formula)
@@ -149,15 +159,11 @@ class FindSolutionReaction(object):
             lhs = self._precursors_other
         elif self._precursors_reduced and not self._precursors_oxided:
             re_tool = [precursor.material_formula for precursor in self._precursors_tool if
-                       precursor.material_formula in REDUCING_AGENT_LIST or [species for species in
-                                                                             precursor.nh2o_species if
-                                                                             species in REDUCING_IONS_LIST]]
+                       precursor.agent_flags.reducer]
             re_tool += [precursor.material_string for precursor in self._precursors_tool if
-                        (not precursor.material_formula) and (precursor.material_string in REDUCING_AGENT_LIST)]
+                        (not precursor.material_formula) and precursor.agent_flags.reducing_string]
             re_candidate = [precursor.material_formula for precursor in self._precursor_candidates if
-                            precursor.material_formula in REDUCING_AGENT_LIST or [species for species in
-                                                                                  precursor.nh2o_species if
-                                                                                  species in REDUCING_IONS_LIST]]
+                            precursor.agent_flags.reducer]
             if re_tool:
 
                 lhs = re_tool + self._precursors_candidates_str
@@ -165,15 +171,11 @@ class FindSolutionReaction(object):
                 lhs = self._precursors_candidates_str
         elif not self._precursors_reduced and self._precursors_oxided:
             ox_tool = [precursor.material_formula for precursor in self._precursors_tool if
-                       precursor.material_formula in OXIDIZING_AGENT_LIST or [species for species in
-                                                                              precursor.nh2o_species if
-                                                                              species in OXIDIZING_IONS_LIST]]
+                       precursor.agent_flags.oxidizer]
             ox_tool += [precursor.material_string for precursor in self._precursors_tool if
-                        (not precursor.material_formula) and (precursor.material_string in OXIDIZING_AGENT_LIST)]
+                        (not precursor.material_formula) and precursor.agent_flags.oxidizing_string]
             ox_candidate = [precursor.material_formula for precursor in self._precursor_candidates if
-                            precursor.material_formula in OXIDIZING_AGENT_LIST or [species for species in
-                                                                                   precursor.nh2o_species if
-                                                                                   species in OXIDIZING_IONS_LIST]]
+                            precursor.agent_flags.oxidizer]
             if ox_tool:
                 lhs = ox_tool + self._precursors_candidates_str
             elif ox_candidate and len(set(self._precursors_candidates_str)) >= 2:
@@ -191,10 +193,10 @@ def clean_targets(targets):
     # clean the duplicate precursors.
     # eg "copper nitrate" and Cu(NO3)2
     n_dup_targets = []
-    n_dup_targets_str = []
+    n_dup_targets_str = set()
     targets_en = []
     targets_chem = []
-    targets_chem_species = []
+    targets_chem_species = set()
     inorg_targets = []
     targets = [target for target in targets if not re.findall('\(([a-z]+)\)', target.material_string)]
 
@@ -205,26 +207,41 @@ def clean_targets(targets):
                     continue
                 if target.material_composition[0]['formula'] not in n_dup_targets_str:
                     n_dup_targets.append(target)
-                    n_dup_targets_str.append(target.material_composition[0]['formula'])
+                    n_dup_targets_str.add(target.material_composition[0]['formula'])
             else:
                 n_dup_targets.append(target)
-                n_dup_targets_str.append(target.material_composition[0]['formula'])
-        except:
+                n_dup_targets_str.add(target.material_composition[0]['formula'])
+        except Exception:
             n_dup_targets.append(target)
     for target in n_dup_targets:
         if target.material_formula.replace(" ", "") != target.material_string.replace(" ", "").replace("@", ""):
             targets_en.append(target)
         else:
             targets_chem.append(target)
-            targets_chem_species.append(target.nh2o_elements)
+            targets_chem_species.add(target.nh2o_elements)
     cleaned_targets = targets_chem + [target for target in targets_en if
                                       target.nh2o_elements not in targets_chem_species]
 
     return cleaned_targets
 
 
-def balance_recipe(precursors, targets, sentences=None):
+def balance_recipe(precursors, targets, sentences=None, diagnostics=False):
+    """
+    Finds the balanced reactions of a recipe, one for every target.
+
+    :param precursors: List of precursor material dictionaries.
+    :param targets: List of target material dictionaries.
+    :param sentences: Sentences of the paragraph, not used.
+    :param diagnostics: If True, also returns a report with the outcome,
+        the exception reason and the per-stage timings of every target.
+        Reports are aggregated by diagnostics.summarize_diagnostics().
+    :return: List of solutions, or (solutions, report) if diagnostics is True.
+    """
     sentences = sentences or []
+    report = new_report() if diagnostics else None
+    recipe_timings = report['timings'] if diagnostics else None
+    records = defaultdict(list)
+
     targets_to_balance = []
     for target in targets:
         has_element_vars = len(target['elements_vars']) != 0
@@ -237,76 +254,118 @@ def balance_recipe(precursors, targets, sentences=None):
         else:
             targets_to_balance.append((target, None))
 
-    def material_dict_to_object(material_dict, sub_dict=None):
-        compositions = []
-        for comp in material_dict['composition']:
-            if "species" in comp.keys():
-                compositions.append({
-                    'formula': comp['formula'],
-                    'amount': comp['amount'],
-                    'elements': comp['elements'],
-                    'species': comp['species']
-                })
-            else:
-                compositions.append({
-                    'formula': comp['formula'],
-                    'amount': comp['amount'],
-                    'elements': comp['elements']
-                })
+    solutions = []
 
-        return MaterialInformation(
-            material_dict['material_string'],
-            material_dict['material_formula'],
-            compositions, sub_dict)
+    # Reject the recipe before any parsing if no target can get its
+    # elements from the precursors.
+    available_mask = precursors_mask(precursors)
+    if all(_rejection_reason(target_mask(target, substitution), available_mask)
+           for target, substitution in targets_to_balance):
+        if diagnostics:
+            for target, substitution in targets_to_balance:
+                reason = _rejection_reason(target_mask(target, substitution), available_mask)
+                report['targets'].append(set_outcome(target_record(target, substitution), REJECTED, reason))
+            return solutions, finish_report(report, REJECTED)
+        return solutions
 
-    solutions = []
     target_objects = []
     target_strings = []
     for target, substitution in targets_to_balance:
+        record = target_record(target, substitution) if diagnostics else None
         try:
-            target_objects.append(material_dict_to_object(target, substitution))
+            with stage_timer(record and record['timings'], 'conversion'):
+                target_object = MaterialInformation.from_dict(target, substitution)
+            target_objects.append(target_object)
             target_strings.append(target['material_string'])
             target_strings.append(target['material_formula'])
             if target['composition']:
                 for target_comp in target['composition']:
                     if target_comp['formula']:
                         target_strings.append(target_comp['formula'])
-        except FormulaException:
+        except FormulaException as e:
+            if diagnostics:
+                report['targets'].append(set_outcome(record, e))
             continue
-    precursor_objects = []
-    for precursor in precursors:
-        try:
-            if precursor['material_string'] in target_strings:  # clean intermediate
-                continue
-            if precursor['material_formula']:
-                if precursor['material_formula'] in target_strings:
-                    continue
-            if precursor['composition']:
-                if precursor['composition'][0]['formula']:
-                    if precursor['composition'][0]['formula'] in target_strings:
-                        continue
-            precursor_objects.append(material_dict_to_object(
-                precursor))
-        except FormulaException:
-            continue
-    target_objects = clean_targets(target_objects)
+        if diagnostics:
+            report['targets'].append(record)
+            records[id(target_object)].append(record)
+    with stage_timer(recipe_timings, 'cleaning'):
+        target_objects = clean_targets(target_objects)
     if len(target_objects) >= 5:
+        if diagnostics:
+            return solutions, finish_report(report, TOO_MANY_TARGETS)
         return solutions
+
+    precursors = [precursor for precursor in precursors if not _is_intermediate(precursor, target_strings)]
+    available_mask = precursors_mask(precursors)
+    targets_to_complete = []
     for target_object in target_objects:
+        record = records[id(target_object)].pop(0) if diagnostics else None
+        reason = _rejection_reason(elements_mask(target_object.nh2o_elements), available_mask)
+        if reason:
+            if diagnostics:
+                set_outcome(record, REJECTED, reason)
+            continue
+        targets_to_complete.append((target_object, record))
+    if not targets_to_complete:
+        if diagnostics:
+            return solutions, finish_report(report, CLEANED)
+        return solutions
+
+    solution_keys = set()
+    precursor_objects = []
+    with stage_timer(recipe_timings, 'conversion'):
+        for precursor in precursors:
+            try:
+                precursor_objects.append(MaterialInformation.from_dict(precursor))
+            except FormulaException as e:
+                if diagnostics:
+                    report['precursor_errors'].append(set_outcome(target_record(precursor, None), e))
+                continue
+    for target_object, record in targets_to_complete:
+        timings = record and record['timings']
         try:
-            completer = FindSolutionReaction(precursor_objects, target_object)
-            solution = completer.reaction()
-            add_able = True
-            if not solutions:
+            completer = FindSolutionReaction(precursor_objects, target_object, timings=timings)
+            with stage_timer(timings, 'reaction'):
+                solution = completer.reaction()
+            solution_key = (frozenset(solution["left_side"]), frozenset(solution["right_side"]))
+            add_able = solution_key not in solution_keys
+            if add_able:
+                solution_keys.add(solution_key)
                 solutions.append(solution)
-            else:
-                for sol in solutions:
-                    if set(sol["left_side"]) == set(solution["left_side"]) and set(sol["right_side"]) == set(
-                            solution["right_side"]):
-                        add_able = False
-
-                if add_able:
-                    solutions.append(solution)
-        except:
-            continue
+            outcome = SOLVED if add_able else DUPLICATE
+        except Exception as e:
+            outcome = e
+        if diagnostics:
+            set_outcome(record, outcome)
+    if diagnostics:
+        return solutions, finish_report(report, CLEANED)
     return solutions
+
+
+def _is_intermediate(precursor, target_strings):
+    # precursors that are one of the targets are intermediates
+    if precursor['material_string'] in target_strings:
+        return True
+    if precursor['material_formula']:
+        if precursor['material_formula'] in target_strings:
+            return True
+    if precursor['composition']:
+        if precursor['composition'][0]['formula']:
+            if precursor['composition'][0]['formula'] in target_strings:
+                return True
+    return False
+
+
+def _rejection_reason(mask, available_mask):
+    """
+    :param mask: Bitmask of target non H2O elements, None for invalid targets.
+    :param available_mask: Bitmask of elements available from precursors.
+    :return: None if the target may be balanced, otherwise the reason.
+    """
+    if mask is None:
+        return 'Target has invalid elements'
+    missing_mask = missing_elements_mask(mask, available_mask)
+    if missing_mask:
+        return 'Precursors do not provide non H2O elements: %r' % sorted(mask_elements(missing_mask))
+    return None
@@ -1,16 +1,83 @@
+import re
 from tokenize import TokenError
 
+from find_solution_reaction.agent import get_agents
+from find_solution_reaction.cache import LRUCache
 from find_solution_reaction.errors import FormulaException
 from find_solution_reaction.periodic_table import NON_VOLATILE_ELEMENTS, ELEMENTS, H2O_ELEMENTS, H2O_SPECIES
+from sympy import Integer, Float
 from sympy.parsing.sympy_parser import parse_expr
-from ValenceSolver.core.composition_inhouse import CompositionInHouse
+from find_solution_reaction.valence import get_valence_dict
 
 __author__ = 'Haoyan Huo, Zheren Wang'
 __maintainer__ = 'Zheren Wang'
 __email__ = 'zherenwang@berkeley.edu'
 
 
+# Process-wide cache of MaterialInformation objects created by
+# MaterialInformation.from_dict(), keyed by the material content.
+MATERIAL_CACHE = LRUCache(maxsize=100000)
+
+_INTEGER_RE = re.compile(r'0|[1-9][0-9]*')
+_DECIMAL_RE = re.compile(r'[0-9]+\.[0-9]*|\.[0-9]+')
+
+
+def parse_amount(amount_s):
+    """
+    Parses molar amount string into sympy number.
+
+    Plain integer and decimal literals ('1', '6', '0.95') are converted
+    directly, giving the same Integer/Float as parse_expr would. Anything
+    else (e.g. '1-x') is parsed by sympy.
+
+    :param amount_s: Amount string.
+    :return: Sympy expression.
+    """
+    if _INTEGER_RE.fullmatch(amount_s):
+        return Integer(amount_s)
+    if _DECIMAL_RE.fullmatch(amount_s):
+        return Float(amount_s)
+    return parse_expr(amount_s)
+
+
+# Element and species sets are shared between materials:
+# the same few thousand sets repeat over the whole dataset.
+INTERNED_SETS = LRUCache(maxsize=100000)
+
+
+def _interned_set(keys):
+    keys = frozenset(keys)
+    interned = INTERNED_SETS.get(keys)
+    if interned is None:
+        INTERNED_SETS.put(keys, keys)
+        return keys
+    return interned
+
+
+def _merge(dict_1, dict_2):
+    """
+    Union of two dictionaries (values of dict_2 win). If one of them is
+    empty, the other one is returned as is.
+    """
+    if not dict_2:
+        return dict_1
+    if not dict_1:
+        return dict_2
+    merged = dict(dict_1)
+    merged.update(dict_2)
+    return merged
+
+
 class MaterialInformation(object):
+    __slots__ = (
+        'material_string', 'material_formula', 'material_composition', 'substitution_dict',
+        'volatile_elements', 'non_h2o_elements', 'other_elements',
+        'non_h2o_species', 'other_species', 'val_dict',
+        '_v_elements', '_nh2o_elements', '_h2o_elements', '_all_elements_dict', '_all_elements',
+        '_nh2o_species', '_h2o_species', '_all_species_dict', '_all_species',
+        '_agent_flags'
+    )
+
     def __init__(self, material_string, material_formula,
                  material_composition, substitution_dict=None):
         """
@@ -44,11 +111,18 @@ class MaterialInformation(object):
         substitution_dict is either None, indicating no substitution is
         to be made; or a dictionary containing the substitution of
         elements in the material_composition dictionary.
+
+        The object is immutable: attributes cannot be reassigned and the
+        parsed dictionaries must not be modified, since instances are
+        shared (see from_dict). Element and species sets (frozensets)
+        and merged dictionaries are computed on first access and kept.
         """
         if not isinstance(material_composition, (list, tuple)):
             material_composition = [material_composition]
 
-        self.material_composition = material_composition
+        # attributes are set once here, __setattr__ always raises
+        set_slot = object.__setattr__
+        set_slot(self, 'material_composition', material_composition)
 
         # Ensure the composition has right data types
         for composition in self.material_composition:
@@ -62,43 +136,61 @@ class MaterialInformation(object):
             for element, amount in composition['elements'].items():
                 if not isinstance(amount, str):
                     composition['elements'][element] = str(amount)
-        self.material_string = material_string
-        self.material_formula = material_formula
-        self.substitution_dict = substitution_dict or {}
-
-        self.volatile_elements = {}
-        self.non_h2o_elements = {}
-        self.other_elements = {}
-        self.non_h2o_species = {}
-        self.other_species = {}
-        self.val_dict = {}
+        set_slot(self, 'material_string', material_string)
+        set_slot(self, 'material_formula', material_formula)
+        set_slot(self, 'substitution_dict', substitution_dict or {})
+
+        set_slot(self, 'volatile_elements', {})
+        set_slot(self, 'non_h2o_elements', {})
+        set_slot(self, 'other_elements', {})
+        set_slot(self, 'non_h2o_species', {})
+        set_slot(self, 'other_species', {})
+        set_slot(self, 'val_dict', {})
         self._parse()
 
+    def _derived(self, name):
+        # derived slots stay unset until first access
+        return getattr(self, name, None)
+
+    def _derived_set(self, name, keys):
+        value = self._derived(name)
+        if value is None:
+            value = _interned_set(keys)
+            object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        raise AttributeError('MaterialInformation is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('MaterialInformation is immutable')
+
+    def __reduce__(self):
+        return (self.__class__, (self.material_string, self.material_formula,
+                                 [dict(c) for c in self.material_composition],
+                                 self.substitution_dict or None))
+
     def _parse(self):
         for component in self.material_composition:
             try:
-                fraction = parse_expr(component['amount'])
+                fraction = parse_amount(component['amount'])
             except (SyntaxError, TokenError):
                 raise FormulaException(
                     'Sympy cannot parse component molar fraction: %s'
                     % component['amount'])
 
-            try:
-                if component['formula']:
-                    comp_val = CompositionInHouse.get_most_possible_oxi_state_of_composition(component['formula'])[
-                        0][0]
-                    for e in comp_val:
-                        if e not in self.val_dict:
-                            self.val_dict[e] = comp_val[e]
-            except:
-                pass
-
+            # compositions may have no formula, see __init__
+            if component.get('formula'):
+                comp_val = get_valence_dict(component['formula']) or {}
+                for e in comp_val:
+                    if e not in self.val_dict:
+                        self.val_dict[e] = comp_val[e]
 
             for element, amount_s in component['elements'].items():
                 element = self.substitution_dict.get(element, element)
 
                 try:
-                    amount = parse_expr(amount_s)
+                    amount = parse_amount(amount_s)
                 except (SyntaxError, TokenError):
                     raise FormulaException(
                         'Sympy cannot parse element amount: %s'
@@ -130,7 +222,7 @@ class MaterialInformation(object):
                     # element = self.substitution_dict.get(element, element)
                     # print(species, amount_s)
                     try:
-                        amount = parse_expr(amount_s)
+                        amount = parse_amount(amount_s)
                     except (SyntaxError, TokenError):
                         raise FormulaException(
                             'Sympy cannot parse element amount: %s'
@@ -147,6 +239,62 @@ class MaterialInformation(object):
                             else:
                                 self.other_species[species] += fraction * amount
 
+    @classmethod
+    def from_dict(cls, material_dict, substitution_dict=None, cache=MATERIAL_CACHE):
+        """
+        Creates MaterialInformation from a material dictionary of the
+        dataset (keys 'material_string', 'material_formula' and
+        'composition').
+
+        Identical inputs return the same shared instance stored in
+        cache, so the returned object must be treated as read-only.
+
+        :param material_dict: Material dictionary.
+        :param substitution_dict: Substitution of elements, or None.
+        :param cache: LRUCache for the instances, None to always create
+            a new object.
+        :return: MaterialInformation
+        """
+        compositions = []
+        for comp in material_dict['composition']:
+            composition = {
+                'formula': comp['formula'],
+                'amount': comp['amount'],
+                'elements': dict(comp['elements'])
+            }
+            if "species" in comp.keys():
+                composition['species'] = dict(comp['species'])
+            compositions.append(composition)
+
+        if cache is None:
+            return cls(material_dict['material_string'], material_dict['material_formula'],
+                       compositions, substitution_dict)
+
+        key = (
+            material_dict['material_string'],
+            material_dict['material_formula'],
+            tuple((comp['formula'], str(comp['amount']),
+                   tuple((e, str(a)) for e, a in comp['elements'].items()),
+                   tuple((sp, str(a)) for sp, a in comp['species'].items()) if 'species' in comp else None)
+                  for comp in compositions),
+            tuple(sorted(substitution_dict.items())) if substitution_dict else None
+        )
+        material = cache.get(key)
+        if material is None:
+            material = cls(material_dict['material_string'], material_dict['material_formula'],
+                           compositions, substitution_dict)
+            cache.put(key, material)
+        return material
+
+    @staticmethod
+    def clear_cache(cache=MATERIAL_CACHE):
+        """
+        Drops all instances created by from_dict() and the interned
+        element/species sets.
+        """
+        cache.clear()
+        INTERNED_SETS.clear()
+
     def __str__(self):
         return '<MaterialInformation for %s>' % self.material_formula
 
@@ -162,7 +310,23 @@ class MaterialInformation(object):
 
     @property
     def v_elements(self):
-        return set(self.volatile_elements.keys())
+        return self._derived_set('_v_elements', self.volatile_elements)
+
+    @property
+    def agent_flags(self):
+        """
+        Oxidizing/reducing agent classification of this material with
+        agent.get_agents(), computed on first access and again after
+        agent.set_agents().
+
+        :rtype: agent.AgentFlags
+        """
+        agents = get_agents()
+        agent_flags = self._derived('_agent_flags')
+        if agent_flags is None or agent_flags[0] is not agents:
+            agent_flags = (agents, agents.classify(self))
+            object.__setattr__(self, '_agent_flags', agent_flags)
+        return agent_flags[1]
 
     @property
     def is_metal_or_alloy(self):
@@ -177,7 +341,7 @@ class MaterialInformation(object):
 
     @property
     def nh2o_elements(self):
-        return set(self.non_h2o_elements.keys())
+        return self._derived_set('_nh2o_elements', self.non_h2o_elements)
 
     @property
     def h2o_elements_dict(self):
@@ -185,17 +349,19 @@ class MaterialInformation(object):
 
     @property
     def h2o_elements(self):
-        return set(self.other_elements.keys())
+        return self._derived_set('_h2o_elements', self.other_elements)
 
     @property
     def all_elements_dict(self):
-        a = self.non_h2o_elements.copy()
-        a.update(self.other_elements)
-        return a
+        value = self._derived('_all_elements_dict')
+        if value is None:
+            value = _merge(self.non_h2o_elements, self.other_elements)
+            object.__setattr__(self, '_all_elements_dict', value)
+        return value
 
     @property
     def all_elements(self):
-        return set(self.all_elements_dict.keys())
+        return self._derived_set('_all_elements', self.all_elements_dict)
 
     @property
     def nh2o_species_dict(self):
@@ -203,7 +369,7 @@ class MaterialInformation(object):
 
     @property
     def nh2o_species(self):
-        return set(self.non_h2o_species.keys())
+        return self._derived_set('_nh2o_species', self.non_h2o_species)
 
     @property
     def h2o_species_dict(self):
@@ -211,17 +377,19 @@ class MaterialInformation(object):
 
     @property
     def h2o_species(self):
-        return set(self.other_species.keys())
+        return self._derived_set('_h2o_species', self.other_species)
 
     @property
     def all_species_dict(self):
-        a = self.non_h2o_species.copy()
-        a.update(self.other_species)
-        return a
+        value = self._derived('_all_species_dict')
+        if value is None:
+            value = _merge(self.non_h2o_species, self.other_species)
+            object.__setattr__(self, '_all_species_dict', value)
+        return value
 
     @property
     def all_species(self):
-        return set(self.all_species_dict.keys())
+        return self._derived_set('_all_species', self.all_species_dict)
 
     @property
     def valence_dict(self):
@@ -2,15 +2,14 @@ import json
 import operator
 import os
 import warnings
-from functools import reduce
-import pandas as pd
+from functools import lru_cache, reduce
 
 
 __author__ = 'Haoyan Huo, Zheren Wang'
 __maintainer__ = 'Zheren Wang'
 __email__ = 'zherenwang@berkeley.edu'
 
-__all__ = ['NON_VOLATILE_ELEMENTS', 'ELEMENTS', 'PT', 'PT_LIST']
+__all__ = ['NON_VOLATILE_ELEMENTS', 'ELEMENTS', 'PT', 'PT_LIST', 'PT_BY_NUMBER', 'load_periodic_table']
 
 NON_VOLATILE_ELEMENTS = {
     'Li', 'Be',
@@ -66,10 +65,31 @@ def _patch_pt(pt):
     return pt
 
 
-PT = {}
-with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'pt.json')) as f:
-    PT_LIST = _patch_pt(json.load(f))
+@lru_cache(maxsize=None)
+def load_periodic_table():
+    """
+    Reads and fixes the periodic table data once per process.
+
+    :return: Tuple (PT_LIST, PT, PT_BY_NUMBER): list of element data,
+        element data keyed by symbol, and tuple of element data indexed
+        by atomic number (index 0 is None).
+    """
+    with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'pt.json')) as f:
+        pt_list = _patch_pt(json.load(f))
+
+    pt = {element['symbol']: element for element in pt_list}
+    pt_by_number = [None] * (max(element['atomicNumber'] for element in pt_list) + 1)
+    for element in pt_list:
+        pt_by_number[element['atomicNumber']] = element
+    return pt_list, pt, tuple(pt_by_number)
+
+
+_LAZY_TABLES = {'PT_LIST': 0, 'PT': 1, 'PT_BY_NUMBER': 2}
 
-for element in PT_LIST:
-    PT[element['symbol']] = element
 
+def __getattr__(name):
+    # PT, PT_LIST and PT_BY_NUMBER are loaded on first access, so that
+    # importing the element sets above does not read pt.json.
+    if name in _LAZY_TABLES:
+        return load_periodic_table()[_LAZY_TABLES[name]]
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,98 @@
+from find_solution_reaction.periodic_table import ELEMENTS, H2O_ELEMENTS, NON_VOLATILE_ELEMENTS
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+__all__ = ['ELEMENT_BITS', 'elements_mask', 'mask_elements',
+           'target_mask', 'precursors_mask', 'missing_elements_mask']
+
+# Element sets are encoded as integer bitmasks, so that targets that cannot
+# be balanced are rejected before any amount parsing or valence solving.
+ELEMENT_BITS = {element: 1 << i for i, element in enumerate(sorted(ELEMENTS))}
+
+
+def elements_mask(elements):
+    """
+    Encodes a set of elements as an integer bitmask.
+    Unknown elements are ignored.
+
+    :param elements: Iterable of element symbols.
+    :return: Integer bitmask.
+    """
+    mask = 0
+    for element in elements:
+        mask |= ELEMENT_BITS.get(element, 0)
+    return mask
+
+
+def mask_elements(mask):
+    """
+    Decodes a bitmask made by elements_mask().
+
+    :param mask: Integer bitmask.
+    :return: Set of element symbols.
+    """
+    return {element for element, bit in ELEMENT_BITS.items() if mask & bit}
+
+
+H2O_MASK = elements_mask(H2O_ELEMENTS)
+NON_VOLATILE_MASK = elements_mask(NON_VOLATILE_ELEMENTS)
+
+
+def _raw_mask(material_dict):
+    mask = 0
+    for component in material_dict['composition'] or []:
+        mask |= elements_mask(component['elements'])
+    return mask
+
+
+def precursors_mask(precursors):
+    """
+    Non H2O elements that the precursors can possibly provide, computed
+    from the raw material dictionaries without parsing any amount.
+    Precursors that FindSolutionReaction skips as metals or alloys are
+    left out. The result is a superset of the elements provided by the
+    precursor candidates, so a target element missing from it cannot be
+    provided by any precursor.
+
+    :param precursors: Iterable of precursor material dictionaries.
+    :return: Integer bitmask.
+    """
+    mask = 0
+    for precursor in precursors:
+        precursor_mask = _raw_mask(precursor)
+        if precursor_mask & ~NON_VOLATILE_MASK:
+            mask |= precursor_mask
+    return mask & ~H2O_MASK
+
+
+def target_mask(target, substitution=None):
+    """
+    Non H2O elements of a raw target dictionary.
+
+    :param target: Target material dictionary.
+    :param substitution: Substitution of element variables, as given
+        to MaterialInformation.
+    :return: Integer bitmask, or None if the target has an invalid
+        element and cannot be converted to MaterialInformation.
+    """
+    substitution = substitution or {}
+    mask = 0
+    for component in target['composition']:
+        for element in component['elements']:
+            bit = ELEMENT_BITS.get(substitution.get(element, element))
+            if bit is None:
+                return None
+            mask |= bit
+    return mask & ~H2O_MASK
+
+
+def missing_elements_mask(mask, available_mask):
+    """
+    :param mask: Bitmask of non H2O elements of a target.
+    :param available_mask: Bitmask from precursors_mask().
+    :return: Bitmask of target elements that no precursor can provide,
+        0 if the target may be balanced.
+    """
+    return mask & ~available_mask
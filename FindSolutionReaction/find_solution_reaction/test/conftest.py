@@ -0,0 +1,71 @@
+import pytest
+
+
+def composition(formula, amount, elements, species=None):
+    component = {'formula': formula, 'amount': amount, 'elements': dict(elements)}
+    if species is not None:
+        component['species'] = dict(species)
+    return component
+
+
+def material(material_string, material_formula, compositions, elements_vars=None):
+    return {'material_string': material_string, 'material_name': '', 'material_formula': material_formula,
+            'phase': '', 'additives': [], 'oxygen_deficiency': None, 'is_acronym': False, 'amounts_vars': {},
+            'elements_vars': elements_vars or {}, 'composition': compositions}
+
+
+def simple(formula, elements, material_string=None, species=None):
+    return material(material_string or formula, formula, [composition(formula, '1', elements, species)])
+
+
+def hydrate(formula, elements, n_water, species=None):
+    return material('%s·%sH2O' % (formula, n_water), '%s·%sH2O' % (formula, n_water),
+                    [composition(formula, '1', elements, species),
+                     composition('H2O', n_water, {'H': '2', 'O': '1'}, {'H2O': '1'})])
+
+
+def make_recipes():
+    fecl3 = hydrate('FeCl3', {'Fe': '1', 'Cl': '3'}, '6', {'Fe': '1', 'Cl': '3'})
+    fecl2 = hydrate('FeCl2', {'Fe': '1', 'Cl': '2'}, '4', {'Fe': '1', 'Cl': '2'})
+    fe_nitrate = hydrate('Fe(NO3)3', {'Fe': '1', 'N': '3', 'O': '9'}, '9', {'Fe': '1', 'NO3': '3'})
+    iron_chloride = simple('FeCl3', {'Fe': '1', 'Cl': '3'}, 'iron chloride', {'Fe': '1', 'Cl': '3'})
+    cu_nitrate = simple('Cu(NO3)2', {'Cu': '1', 'N': '2', 'O': '6'}, species={'Cu': '1', 'NO3': '2'})
+    ba_nitrate = simple('Ba(NO3)2', {'Ba': '1', 'N': '2', 'O': '6'}, species={'Ba': '1', 'NO3': '2'})
+    hydrazine = simple('N2H4', {'N': '2', 'H': '4'})
+    iron = simple('Fe', {'Fe': '1'})
+
+    fe3o4 = simple('Fe3O4', {'Fe': '3', 'O': '4'})
+    fe2o3 = simple('Fe2O3', {'Fe': '2', 'O': '3'})
+    cuo = simple('CuO', {'Cu': '1', 'O': '1'})
+    zno = simple('ZnO', {'Zn': '1', 'O': '1'})
+    nio = simple('NiO', {'Ni': '1', 'O': '1'})
+    coo = simple('CoO', {'Co': '1', 'O': '1'})
+    mno = simple('MnO', {'Mn': '1', 'O': '1'})
+    tio2 = simple('TiO2', {'Ti': '1', 'O': '2'})
+    batio3 = simple('BaTiO3', {'Ba': '1', 'Ti': '1', 'O': '3'})
+    mfe2o4 = material('MFe2O4', 'MFe2O4', [composition('MFe2O4', '1', {'M': '1', 'Fe': '2', 'O': '4'})],
+                      {'M': ['Cu', 'Zn']})
+    invalid = simple('Xx2O', {'Xx': '2', 'O': '1'})
+
+    return {
+        'magnetite': ([fecl3, fecl2], [fe3o4]),
+        'duplicate_precursors': ([fecl3, iron_chloride, fecl3, fe_nitrate], [fe2o3, fe3o4]),
+        'missing_element': ([fecl3, fecl2], [cuo]),
+        'partly_missing': ([cu_nitrate, hydrazine], [cuo, batio3]),
+        'intermediate': ([fe_nitrate, fe2o3], [fe2o3, fe3o4]),
+        'intermediate_only_source': ([tio2, ba_nitrate], [tio2, batio3]),
+        'too_many_targets': ([fecl3, cu_nitrate], [fe2o3, fe3o4, cuo, zno, nio]),
+        'too_many_rejected_targets': ([fecl3], [cuo, zno, nio, coo, mno]),
+        'element_variables': ([cu_nitrate, fecl3], [mfe2o4]),
+        'invalid_target': ([fecl3, fecl2], [invalid, fe3o4]),
+        'metal_precursor': ([iron, cu_nitrate], [fe3o4, cuo]),
+        'precursor_is_target': ([simple('O3Fe2', {'Fe': '2', 'O': '3'}, 'iron oxide')], [fe2o3]),
+    }
+
+
+@pytest.fixture
+def recipes():
+    """
+    Recipes by name, as (precursors, targets), built anew for every test.
+    """
+    return make_recipes()
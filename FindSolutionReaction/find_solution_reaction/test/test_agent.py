@@ -0,0 +1,37 @@
+import json
+
+from conftest import simple
+
+from find_solution_reaction.agent import (
+    OXIDIZING_AGENTS, REDUCING_IONS, load_agents, get_agents, set_agents, classify_material)
+from find_solution_reaction.material import MaterialInformation
+
+
+def test_bundled_agents():
+    agents = load_agents()
+    assert agents == get_agents()
+    assert agents.oxidizing_agents == OXIDIZING_AGENTS
+    assert agents.reducing_ions == REDUCING_IONS
+
+
+def test_custom_agents(tmp_path):
+    path = tmp_path / 'agents.json'
+    path.write_text(json.dumps({'oxidizing_agents': ['KMnO4'], 'reducing_agents': [],
+                                'oxidizing_ions': [], 'reducing_ions': ['Cl']}))
+    permanganate = MaterialInformation.from_dict(simple('KMnO4', {'K': '1', 'Mn': '1', 'O': '4'}))
+    chloride = MaterialInformation.from_dict(
+        simple('NaCl', {'Na': '1', 'Cl': '1'}, species={'Na': '1', 'Cl': '1'}))
+    assert not permanganate.agent_flags.oxidizer
+    assert not chloride.agent_flags.reducer
+
+    agents = load_agents(str(path))
+    assert classify_material(permanganate, agents).oxidizing_formula
+    set_agents(agents)
+    try:
+        assert permanganate.agent_flags == classify_material(permanganate)
+        assert permanganate.agent_flags.oxidizer
+        assert chloride.agent_flags.reducing_ion
+    finally:
+        set_agents(None)
+    assert permanganate.agent_flags == classify_material(permanganate)
+    assert not permanganate.agent_flags.oxidizer
@@ -0,0 +1,76 @@
+from find_solution_reaction.batch import balance_recipes
+from find_solution_reaction.finder import balance_recipe
+
+
+def _batch_input(recipes):
+    names = sorted(recipes)
+    batch = [recipes[name] for name in names]
+    # target without "elements_vars" makes balance_recipe raise
+    broken_target = dict(recipes['magnetite'][1][0])
+    del broken_target['elements_vars']
+    batch.insert(3, (recipes['magnetite'][0], [broken_target]))
+    return batch
+
+
+def test_records_in_input_order(recipes):
+    batch = _batch_input(recipes)
+    results = list(balance_recipes(batch, workers=2, chunksize=2))
+
+    assert [r['index'] for r in results] == list(range(len(batch)))
+    for result, (precursors, targets) in zip(results, batch):
+        if result['error'] is None:
+            assert result['solutions'] == balance_recipe(precursors, targets)
+        assert 'diagnostics' not in result
+
+
+def test_error_records(recipes):
+    results = list(balance_recipes(_batch_input(recipes), workers=2, chunksize=3))
+
+    errors = [r for r in results if r['error'] is not None]
+    assert len(errors) == 1
+    assert errors[0]['index'] == 3
+    assert errors[0]['error'] == {'type': 'KeyError', 'message': "'elements_vars'"}
+    assert errors[0]['solutions'] == []
+
+
+def test_failed_targets_are_reported(recipes):
+    batch = [recipes['precursor_is_target'], recipes['invalid_target'], recipes['magnetite']]
+    results = list(balance_recipes(batch, workers=2, chunksize=1))
+
+    assert [r['error'] for r in results] == [None, None, None]
+    failed, partly_failed, solved = results
+    assert failed['solutions'] == []
+    assert failed['failures'] == [{'material_string': 'Fe2O3', 'substitution': None,
+                                   'outcome': 'StupidRecipe', 'reason': 'Precursor list contains target'}]
+    assert len(partly_failed['solutions']) == 1
+    assert [(f['material_string'], f['outcome']) for f in partly_failed['failures']] == \
+        [('Xx2O', 'FormulaException')]
+    assert solved['failures'] == []
+
+
+def test_diagnostics(recipes):
+    batch = [recipes['partly_missing'], recipes['too_many_targets']]
+    results = list(balance_recipes(batch, diagnostics=True))
+
+    for result, (precursors, targets) in zip(results, batch):
+        solutions, report = balance_recipe(precursors, targets, diagnostics=True)
+        assert result['solutions'] == solutions
+        assert [r['outcome'] for r in result['diagnostics']['targets']] == [r['outcome'] for r in report['targets']]
+
+
+def test_input_is_read_lazily(recipes):
+    read = []
+
+    def stream():
+        for i in range(200):
+            read.append(i)
+            yield recipes['magnetite']
+
+    results = balance_recipes(stream(), workers=2, chunksize=1)
+    first = [next(results) for _ in range(3)]
+    # 3 chunks consumed, at most 2 per worker in flight
+    assert len(read) <= 3 + 2 * 2
+    assert [r['index'] for r in first] == [0, 1, 2]
+
+    assert [r['index'] for r in results] == list(range(3, 200))
+    assert len(read) == 200
@@ -0,0 +1,41 @@
+from benchmarks.dedup_stress import (
+    noisy_materials, clean_precursors, reference_clean_precursors, reference_clean_targets)
+from conftest import composition, material
+
+from find_solution_reaction.diagnostics import SOLVED, DUPLICATE
+from find_solution_reaction.finder import balance_recipe, clean_targets
+from find_solution_reaction.material import MaterialInformation
+
+TARGET = MaterialInformation('LiNi0.5Mn0.5O2', 'LiNi0.5Mn0.5O2',
+                             [{'formula': 'LiNi0.5Mn0.5O2', 'amount': '1',
+                               'elements': {'Li': '1', 'Ni': '0.5', 'Mn': '0.5', 'O': '2'}}])
+
+
+def _materials(n, seed):
+    return [MaterialInformation.from_dict(m, cache=None) for m in noisy_materials(n, seed)]
+
+
+def test_clean_precursors_matches_reference():
+    for seed in range(5):
+        materials = _materials(300, seed)
+        cleaned = clean_precursors(materials, TARGET)
+        assert [id(m) for m in cleaned] == [id(m) for m in reference_clean_precursors(materials, TARGET)]
+        assert 0 < len(cleaned) < len(materials)
+
+
+def test_clean_targets_matches_reference():
+    for seed in range(5):
+        materials = _materials(300, seed)
+        cleaned = clean_targets(materials)
+        assert [id(m) for m in cleaned] == [id(m) for m in reference_clean_targets(materials)]
+        assert 0 < len(cleaned) < len(materials)
+
+
+def test_solutions_are_deduplicated(recipes):
+    precursors, targets = recipes['magnetite']
+    # kept by clean_targets (other composition formula), but gives the same reaction
+    same_reaction = material('Fe3O4', 'Fe3O4', [composition('FeO·Fe2O3', '1', {'Fe': '3', 'O': '4'})])
+
+    solutions, report = balance_recipe(precursors, targets + [same_reaction], diagnostics=True)
+    assert solutions == balance_recipe(precursors, targets)
+    assert [r['outcome'] for r in report['targets']] == [SOLVED, DUPLICATE]
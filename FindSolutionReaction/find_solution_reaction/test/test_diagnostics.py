@@ -0,0 +1,93 @@
+from conftest import composition, material
+
+from find_solution_reaction.diagnostics import (
+    STAGES, SOLVED, CLEANED, TOO_MANY_TARGETS, REJECTED, summarize_diagnostics)
+from find_solution_reaction.finder import balance_recipe
+from find_solution_reaction.material import MaterialInformation
+
+
+def _outcomes(report):
+    return [(r['material_string'], r['substitution'], r['outcome'], r['reason']) for r in report['targets']]
+
+
+def test_composition_without_formula():
+    water = MaterialInformation('H2O', 'H2O', {'amount': '1.0', 'elements': {'O': 1, 'H': 2}})
+    assert water.all_elements_dict == {'O': 1.0, 'H': 2.0}
+    assert water.valence_dict == {}
+
+
+def test_recipe_without_formulas():
+    # no formula, so no oxidation states: the result does not depend on ValenceSolver
+    precursors = [material('FeCl3·6H2O', 'FeCl3·6H2O', [composition('', '1', {'Fe': '1', 'Cl': '3'}),
+                                                         composition('', '6', {'H': '2', 'O': '1'})])]
+    targets = [material('Fe3O4', 'Fe3O4', [composition('', '1', {'Fe': '3', 'O': '4'})])]
+
+    assert balance_recipe(precursors, targets) == [
+        {'left_side': ['FeCl3·6H2O'], 'right_side': ['Fe3O4'], 'reaction_string': 'FeCl3·6H2O -> Fe3O4'}]
+    solutions, report = balance_recipe(precursors, targets, diagnostics=True)
+    assert len(solutions) == 1
+    assert _outcomes(report) == [('Fe3O4', None, SOLVED, None)]
+
+
+def test_output_without_diagnostics(recipes):
+    for name in ('missing_element', 'intermediate_only_source', 'too_many_targets',
+                 'too_many_rejected_targets', 'precursor_is_target'):
+        assert balance_recipe(*recipes[name]) == [], name
+
+    for name, (precursors, targets) in recipes.items():
+        solutions, report = balance_recipe(precursors, targets, diagnostics=True)
+        assert balance_recipe(precursors, targets) == solutions, name
+        assert len(report['targets']) >= len(solutions), name
+
+
+def test_report_shape(recipes):
+    solutions, report = balance_recipe(*recipes['partly_missing'], diagnostics=True)
+
+    assert set(report) == {'targets', 'precursor_errors', 'timings'}
+    assert len(solutions) == 1
+    assert _outcomes(report) == [
+        ('CuO', None, SOLVED, None),
+        ('BaTiO3', None, REJECTED, "Precursors do not provide non H2O elements: ['Ba', 'Ti']")]
+    solved = report['targets'][0]
+    assert set(solved['timings']) == set(STAGES)
+    assert all(seconds >= 0 for seconds in solved['timings'].values())
+    assert set(report['timings']) <= set(STAGES)
+    assert report['timings']['reaction'] >= solved['timings']['reaction']
+
+
+def test_report_outcomes(recipes):
+    _, report = balance_recipe(*recipes['invalid_target'], diagnostics=True)
+    assert _outcomes(report) == [('Xx2O', None, 'FormulaException', 'Xx is not a valid chemical element'),
+                                 ('Fe3O4', None, SOLVED, None)]
+
+    _, report = balance_recipe(*recipes['precursor_is_target'], diagnostics=True)
+    assert _outcomes(report) == [('Fe2O3', None, 'StupidRecipe', 'Precursor list contains target')]
+
+    _, report = balance_recipe(*recipes['too_many_targets'], diagnostics=True)
+    assert [r['outcome'] for r in report['targets']] == [TOO_MANY_TARGETS] * 5
+
+    _, report = balance_recipe(*recipes['element_variables'], diagnostics=True)
+    assert [(r['substitution'], r['outcome']) for r in report['targets']] == [
+        ({'M': 'Cu'}, SOLVED), ({'M': 'Zn'}, CLEANED)]
+
+
+def test_precursor_errors(recipes):
+    precursors, targets = recipes['magnetite']
+    invalid = material('Xx2O', 'Xx2O', [composition('Xx2O', '1', {'Xx': '2', 'O': '1'})])
+    solutions, report = balance_recipe(precursors + [invalid], targets, diagnostics=True)
+
+    assert solutions == balance_recipe(precursors, targets)
+    assert [(e['material_string'], e['outcome']) for e in report['precursor_errors']] == \
+        [('Xx2O', 'FormulaException')]
+
+
+def test_summarize_diagnostics(recipes):
+    reports = [balance_recipe(*recipes[name], diagnostics=True)[1]
+               for name in ('partly_missing', 'invalid_target', 'too_many_targets')]
+    summary = summarize_diagnostics(reports + [None])
+
+    assert summary['recipes'] == 3
+    assert summary['targets'] == 9
+    assert summary['outcomes'] == {SOLVED: 2, REJECTED: 1, 'FormulaException': 1, TOO_MANY_TARGETS: 5}
+    assert summary['reasons'][REJECTED] == {"Precursors do not provide non H2O elements: ['Ba', 'Ti']": 1}
+    assert set(summary['timings']) <= set(STAGES)
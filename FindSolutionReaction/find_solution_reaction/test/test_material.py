@@ -0,0 +1,123 @@
+import pickle
+
+import pytest
+from sympy import srepr
+from sympy.parsing.sympy_parser import parse_expr
+
+from conftest import composition, material
+from find_solution_reaction.cache import LRUCache
+from find_solution_reaction.material import MATERIAL_CACHE, MaterialInformation, parse_amount
+
+
+def _hydrate():
+    return MaterialInformation('FeCl3·6H2O', 'FeCl3·6H2O',
+                               [{'formula': 'FeCl3', 'amount': '1', 'elements': {'Fe': '1', 'Cl': '3'},
+                                 'species': {'Fe': '1', 'Cl': '3'}},
+                                {'formula': 'H2O', 'amount': '6', 'elements': {'H': '2', 'O': '1'},
+                                 'species': {'H2O': '1'}}])
+
+
+@pytest.mark.parametrize('amount_s', [
+    # integers and decimals take the regex fast paths
+    '0', '1', '6', '12', '100000000000000000000',
+    '0.5', '0.05', '0.95', '0.33', '1.0', '1.', '.5', '00.5', '10.25', '0.1234567890123456789',
+    # everything else goes through parse_expr
+    '1e3', '1-x', '2*x', 'x', '0.5+y', '1 - x',
+    ' 1', '1 ', '\t2', ' 0.5 ',
+])
+def test_parse_amount(amount_s):
+    # same sympy type, value and precision as parse_expr
+    assert srepr(parse_amount(amount_s)) == srepr(parse_expr(amount_s))
+
+
+@pytest.mark.parametrize('amount_s', ['01', '007', '1..5', ''])
+def test_parse_amount_invalid(amount_s):
+    # not Python number literals (e.g. leading zeros): the fallback raises like parse_expr
+    with pytest.raises(SyntaxError):
+        parse_expr(amount_s)
+    with pytest.raises(SyntaxError):
+        parse_amount(amount_s)
+
+
+def test_interning():
+    cache = LRUCache(maxsize=10)
+    mfe2o4 = material('MFe2O4', 'MFe2O4', [composition('MFe2O4', '1', {'M': '1', 'Fe': '2', 'O': '4'})],
+                      {'M': ['Cu', 'Zn']})
+    # equal dict built anew, amounts given as numbers
+    same = material('MFe2O4', 'MFe2O4', [composition('MFe2O4', 1, {'M': 1, 'Fe': 2, 'O': 4})])
+
+    cu_ferrite = MaterialInformation.from_dict(mfe2o4, {'M': 'Cu'}, cache=cache)
+    assert MaterialInformation.from_dict(same, {'M': 'Cu'}, cache=cache) is cu_ferrite
+    assert MaterialInformation.from_dict(mfe2o4, {'M': 'Zn'}, cache=cache) is not cu_ferrite
+    assert len(cache) == 2
+    assert cu_ferrite.nh2o_elements == {'Cu', 'Fe'}
+
+    # input dicts are not modified
+    assert mfe2o4['composition'][0]['elements'] == {'M': '1', 'Fe': '2', 'O': '4'}
+
+    assert MaterialInformation.from_dict(mfe2o4, {'M': 'Cu'}, cache=None) is not cu_ferrite
+
+
+def test_clear_cache():
+    fe3o4 = material('Fe3O4', 'Fe3O4', [composition('Fe3O4', '1', {'Fe': '3', 'O': '4'})])
+    first = MaterialInformation.from_dict(fe3o4)
+    assert MaterialInformation.from_dict(fe3o4) is first
+    assert len(MATERIAL_CACHE) > 0
+
+    MaterialInformation.clear_cache()
+    assert len(MATERIAL_CACHE) == 0
+    assert MATERIAL_CACHE.stats['hits'] == 0
+    assert MaterialInformation.from_dict(fe3o4) is not first
+
+
+def test_immutable():
+    material = _hydrate()
+    with pytest.raises(AttributeError):
+        material.material_string = 'FeCl3'
+    with pytest.raises(AttributeError):
+        material.non_h2o_elements = {}
+    with pytest.raises(AttributeError):
+        material.new_attribute = 1
+    with pytest.raises(AttributeError):
+        del material.material_formula
+
+    # derived values are computed once, after construction
+    assert material.all_elements == {'Fe', 'Cl', 'H', 'O'}
+    assert material.all_elements is material.all_elements
+    assert material.all_elements_dict is material.all_elements_dict
+
+
+def test_merged_dicts_are_shared():
+    chloride = MaterialInformation('FeCl3', 'FeCl3', [{'formula': 'FeCl3', 'amount': '1',
+                                                       'elements': {'Fe': '1', 'Cl': '3'}}])
+    # no H2O elements: the non H2O side is returned as is
+    assert chloride.all_elements_dict == {'Fe': 1, 'Cl': 3}
+    assert chloride.all_elements_dict is chloride.nh2o_elements_dict
+    assert chloride.all_species_dict == {}
+
+    hydrate = _hydrate()
+    assert hydrate.all_elements_dict == {'Fe': 1, 'Cl': 3, 'H': 12, 'O': 6}
+    assert hydrate.all_species_dict == {'Fe': 1, 'Cl': 3, 'H2O': 6}
+
+
+def test_pickle():
+    material = _hydrate()
+    _ = material.all_elements
+    restored = pickle.loads(pickle.dumps(material))
+
+    assert restored is not material
+    assert restored.material_string == material.material_string
+    assert restored.material_formula == material.material_formula
+    assert list(restored.material_composition) == list(material.material_composition)
+    assert restored.all_elements_dict == material.all_elements_dict
+    assert restored.all_species_dict == material.all_species_dict
+    assert restored.all_elements == material.all_elements
+    assert restored.valence_dict == material.valence_dict
+    with pytest.raises(AttributeError):
+        restored.material_string = 'FeCl3'
+
+    substituted = MaterialInformation('MO', 'MO', [{'formula': 'MO', 'amount': '1',
+                                                    'elements': {'M': '1', 'O': '1'}}], {'M': 'Cu'})
+    restored = pickle.loads(pickle.dumps(substituted))
+    assert restored.substitution_dict == {'M': 'Cu'}
+    assert restored.nh2o_elements == {'Cu'}
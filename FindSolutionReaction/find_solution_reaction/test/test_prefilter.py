@@ -0,0 +1,56 @@
+import random
+
+from conftest import make_recipes, material
+
+from find_solution_reaction import finder
+from find_solution_reaction.finder import balance_recipe
+from find_solution_reaction.prefilter import (
+    elements_mask, mask_elements, precursors_mask, target_mask, missing_elements_mask)
+
+
+def _mixed_recipes(n, seed=0):
+    # random recipes from the materials of the shared recipes, with up to 6 targets
+    recipes = make_recipes().values()
+    precursors = [p for recipe_precursors, _ in recipes for p in recipe_precursors]
+    targets = [t for _, recipe_targets in recipes for t in recipe_targets]
+    rnd = random.Random(seed)
+    for _ in range(n):
+        yield (rnd.sample(precursors, rnd.randint(1, 5)) + rnd.sample(targets, rnd.randint(0, 1)),
+               rnd.sample(targets, rnd.choice([1, 1, 2, 3, 5, 6])))
+
+
+def test_masks():
+    mask = elements_mask(['Fe', 'O', 'Xx'])
+    assert mask_elements(mask) == {'Fe', 'O'}
+    assert missing_elements_mask(elements_mask(['Fe', 'Cu']), elements_mask(['Fe'])) == elements_mask(['Cu'])
+
+    recipes = make_recipes()
+    # metal Fe is skipped like in FindSolutionReaction, H and O never count
+    assert mask_elements(precursors_mask(recipes['metal_precursor'][0])) == {'Cu', 'N'}
+    assert mask_elements(target_mask(recipes['magnetite'][1][0])) == {'Fe'}
+    assert target_mask(recipes['invalid_target'][1][0]) is None
+    mfe2o4 = recipes['element_variables'][1][0]
+    assert mask_elements(target_mask(mfe2o4, {'M': 'Cu'})) == {'Cu', 'Fe'}
+    assert target_mask(mfe2o4) is None
+
+
+def test_prefilter_keeps_results(recipes, monkeypatch):
+    batch = list(recipes.values()) + list(_mixed_recipes(300))
+    filtered = [balance_recipe(precursors, targets) for precursors, targets in batch]
+
+    # without rejection reasons every target goes through FindSolutionReaction
+    monkeypatch.setattr(finder, '_rejection_reason', lambda mask, available_mask: None)
+    unfiltered = [balance_recipe(precursors, targets) for precursors, targets in batch]
+
+    assert filtered == unfiltered
+    assert any(filtered) and not all(filtered)
+
+
+def test_intermediate_without_composition(recipes):
+    precursors, targets = recipes['magnetite']
+    # skipped as an intermediate before its composition is ever parsed
+    intermediate = material('Fe3O4', 'Fe3O4', None)
+
+    assert precursors_mask([intermediate]) == 0
+    assert balance_recipe(precursors + [intermediate], targets) == balance_recipe(precursors, targets)
+    assert balance_recipe(precursors + [intermediate], targets)
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from sympy import Integer, Rational
+
+from find_solution_reaction import valence
+from find_solution_reaction.cache import LRUCache
+from find_solution_reaction.valence import get_valence_dict, save_valence_cache, load_valence_cache
+
+OXI_STATES = {
+    'Fe3O4': {'Fe': Rational(8, 3), 'O': Integer(-2)},
+    'CuO': {'Cu': 2, 'O': -2},
+    'NaCl': {'Na': 1.0, 'Cl': -1.0},
+}
+
+
+@pytest.fixture
+def solver_calls(monkeypatch):
+    # ValenceSolver replaced by a table, every call is recorded
+    calls = []
+
+    def get_most_possible_oxi_state_of_composition(formula):
+        calls.append(formula)
+        return [[OXI_STATES[formula]]]
+
+    monkeypatch.setattr(valence.CompositionInHouse, 'get_most_possible_oxi_state_of_composition',
+                        get_most_possible_oxi_state_of_composition)
+    return calls
+
+
+def test_hit_and_miss(solver_calls):
+    cache = LRUCache(maxsize=10)
+
+    assert get_valence_dict('Fe3O4', cache) == OXI_STATES['Fe3O4']
+    assert get_valence_dict('Fe3O4', cache) is get_valence_dict('Fe3O4', cache)
+    assert solver_calls == ['Fe3O4']
+    assert cache.stats['hits'] == 2 and cache.stats['misses'] == 1
+
+    # unsolvable formulas are cached as None
+    assert get_valence_dict('Xx2O', cache) is None
+    assert get_valence_dict('Xx2O', cache) is None
+    assert solver_calls == ['Fe3O4', 'Xx2O']
+
+    assert get_valence_dict('CuO', None) == OXI_STATES['CuO']
+    assert get_valence_dict('CuO', None) == OXI_STATES['CuO']
+    assert solver_calls == ['Fe3O4', 'Xx2O', 'CuO', 'CuO']
+    assert 'CuO' not in cache
+
+
+def test_save_load(solver_calls, tmp_path):
+    cache = LRUCache(maxsize=10)
+    for formula in ('Fe3O4', 'CuO', 'NaCl', 'Xx2O'):
+        get_valence_dict(formula, cache)
+    path = str(tmp_path / 'valence.json')
+    save_valence_cache(path, cache)
+
+    # sympy numbers are written as floats
+    with open(path) as f:
+        assert json.load(f)['Fe3O4'] == {'Fe': float(Rational(8, 3)), 'O': -2.0}
+
+    loaded = LRUCache(maxsize=10)
+    load_valence_cache(path, loaded)
+    del solver_calls[:]
+    assert [formula for formula, _ in loaded.items()] == ['Fe3O4', 'CuO', 'NaCl', 'Xx2O']
+    for formula in ('Fe3O4', 'CuO', 'NaCl'):
+        assert get_valence_dict(formula, loaded) == pytest.approx(
+            {element: float(state) for element, state in OXI_STATES[formula].items()})
+    assert get_valence_dict('Xx2O', loaded) is None
+    assert solver_calls == []
+
+
+def test_eviction(solver_calls):
+    cache = LRUCache(maxsize=2)
+    get_valence_dict('Fe3O4', cache)
+    get_valence_dict('CuO', cache)
+    get_valence_dict('Fe3O4', cache)
+    # CuO is the least recently used
+    get_valence_dict('NaCl', cache)
+
+    assert len(cache) == 2
+    assert 'CuO' not in cache and 'Fe3O4' in cache and 'NaCl' in cache
+    get_valence_dict('CuO', cache)
+    assert solver_calls == ['Fe3O4', 'CuO', 'NaCl', 'CuO']
+    assert 'Fe3O4' not in cache
+
+
+def test_default_capacity():
+    assert valence.VALENCE_CACHE.maxsize == 200000
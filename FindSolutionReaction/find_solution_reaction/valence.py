@@ -0,0 +1,71 @@
+import json
+
+from find_solution_reaction.cache import LRUCache
+from ValenceSolver.core.composition_inhouse import CompositionInHouse
+
+__author__ = 'Zheren Wang'
+__maintainer__ = 'Zheren Wang'
+__email__ = 'zherenwang@berkeley.edu'
+
+__all__ = ['VALENCE_CACHE', 'get_valence_dict', 'warm_valence_cache',
+           'save_valence_cache', 'load_valence_cache']
+
+# Process-wide cache of the most possible oxidation states, keyed by formula.
+# Formulas that cannot be solved are stored as None.
+VALENCE_CACHE = LRUCache(maxsize=200000)
+
+_MISSING = object()
+
+
+def get_valence_dict(formula, cache=VALENCE_CACHE):
+    """
+    Most possible oxidation states of a formula, memoized in cache.
+
+    :param formula: Chemical formula.
+    :param cache: LRUCache to use, None to disable caching.
+    :return: Dictionary of element: oxidation state, or None if
+        ValenceSolver cannot solve the formula. Must not be modified.
+    """
+    valence = cache.get(formula, _MISSING) if cache is not None else _MISSING
+    if valence is _MISSING:
+        try:
+            valence = CompositionInHouse.get_most_possible_oxi_state_of_composition(formula)[0][0]
+        except Exception:
+            valence = None
+        if cache is not None:
+            cache.put(formula, valence)
+    return valence
+
+
+def warm_valence_cache(formulas, cache=VALENCE_CACHE):
+    """
+    Solves formulas ahead of a run.
+
+    :param formulas: Iterable of chemical formulas.
+    :param cache: LRUCache to fill.
+    """
+    for formula in formulas:
+        get_valence_dict(formula, cache)
+
+
+def save_valence_cache(path, cache=VALENCE_CACHE):
+    """
+    Writes cached oxidation states into a JSON file.
+
+    :param path: Output file path.
+    :param cache: LRUCache to save.
+    """
+    with open(path, 'w') as f:
+        json.dump(dict(cache.items()), f, default=float)
+
+
+def load_valence_cache(path, cache=VALENCE_CACHE):
+    """
+    Loads oxidation states saved by save_valence_cache().
+
+    :param path: JSON file path.
+    :param cache: LRUCache to fill.
+    """
+    with open(path) as f:
+        for formula, valence in json.load(f).items():
+            cache.put(formula, valence)
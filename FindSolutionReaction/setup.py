@@ -8,10 +8,11 @@ if __name__ == "__main__":
     setup(
         name='FindSolutionReaction',
         version="0.0.1",
-        python_requires='>=3.4',
+        python_requires='>=3.7',
         author=__author__,
         author_email=__email__,
         packages=find_packages(),
+        package_data={'find_solution_reaction': ['*.json']},
         zip_safe=False,
         install_requires=[
             'ValenceSolver',
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""
+Micro-benchmark of time/temperature tokens scanning in conditions_extraction.
+Compares single-pass scan and batch scan with the original per-token implementation (kept below as reference)
+on graph_test.json sentences and all their suffixes, fails if outputs differ.
+
+Usage (from OperationsExtraction folder):
+    python -m benchmarks.conditions_scan [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import regex as re
+
+from operations_extractor import conditions_extraction
+
+
+def reference_times_toks(sentence_toks):
+    times = []
+    time_units = ["h", "hr", "hrs", "min", "hour", "hours", "minutes", "d", "day", "days"]
+
+    for num, (tok, next_tok) in enumerate(zip(sentence_toks, sentence_toks[1:])):
+        if tok == "overnight":
+            times.append({"tok_id": num, "value": "overnight", "units": "N/A"})
+        elif next_tok == "days":
+            times.append({"tok_id": num, "value": tok, "units": "day"})
+        else:
+            tok_num = re.findall(r"(^[0-9\-\.\,]*)\s*[hrsmind]*", tok)[0].replace(",", "")
+            tok_unit = re.findall(r"[0-9\-\.\,]*\s*([hrsmind]*$)", tok)[0]
+            tok_unit = next_tok if tok_unit == "" else tok_unit
+
+            if tok_num != "" and all(t in "0987654321-,." for t in tok_num) and tok_unit in time_units:
+                times.append({"tok_id": num, "value": tok_num, "units": tok_unit})
+
+    return times
+
+
+def reference_temperatures_toks(sentence_toks):
+    temperatures = []
+    rate_units = ["/", "min-1", "h-1", "per"]
+
+    for num, (tok, next_tok) in enumerate(zip(sentence_toks, sentence_toks[1:])):
+        if tok == "room" and sentence_toks[num - 1] != "from":
+            temperatures.append({"tok_id": num, "value": "RT", "units": "N/A"})
+        else:
+            tok_num = re.findall(r"(^[0-9\-\.\,]*)\s*[°KC]*", tok)[0].replace(",", "")
+            tok_unit = re.findall(r"[0-9\-\.\,]*\s*([°KC]*$)", tok)[0]
+            tok_unit = next_tok if tok_unit == "" else tok_unit
+            tok_unit = '°C' if tok_unit == '°' else tok_unit
+            next_toks = "".join([sentence_toks[i] for i in range(num + 1, num + 4) if i < len(sentence_toks)])
+
+            if tok_num != "" \
+                    and all(t in "0987654321-." for t in tok_num) \
+                    and all(t in "°KC" for t in tok_unit) \
+                    and all(r not in next_toks for r in rate_units):
+                temperatures.append({"tok_id": num, "value": tok_num, "units": tok_unit})
+
+    return temperatures
+
+
+def reference_scan(sentences):
+    return [(reference_times_toks(s), reference_temperatures_toks(s)) for s in sentences]
+
+
+def scan(sentences):
+    return [conditions_extraction.scan_conditions_toks(s) for s in sentences]
+
+
+def scan_batch(sentences):
+    return [(r["times"], r["temperatures"]) for r in conditions_extraction.extract_conditions_batch(sentences)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                                                       "graph_test.json"))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    test_data = json.loads(open(args.data).read())
+    sentences = [data["tokens"][i:] for data in test_data for i in range(len(data["tokens"]))]
+
+    expected = reference_scan(sentences)
+    result = scan(sentences)
+    if result != expected or scan_batch(sentences) != expected:
+        print("FAIL: scan output differs from reference")
+        sys.exit(1)
+    print("Scan output equal to reference: %i sentences, %i time tokens, %i temperature tokens"
+          % (len(sentences), sum(len(t) for t, _ in result), sum(len(t) for _, t in result)))
+
+    reference_time = min(timeit.repeat(lambda: reference_scan(sentences), number=1, repeat=args.repeat))
+    scan_time = min(timeit.repeat(lambda: scan(sentences), number=1, repeat=args.repeat))
+    print("reference: %8.2f ms" % (reference_time * 1000))
+    batch_time = min(timeit.repeat(lambda: scan_batch(sentences), number=1, repeat=args.repeat))
+    print("scan:      %8.2f ms (x%.1f)" % (scan_time * 1000, reference_time / scan_time))
+    print("batch:     %8.2f ms (x%.1f)" % (batch_time * 1000, reference_time / batch_time))
@@ -0,0 +1,59 @@
+# coding=utf-8
+"""
+Import time benchmark of operations_extractor modules.
+Each module is imported in a fresh interpreter; the script fails if the import takes longer
+than the limit or if it pulls in heavy dependencies (spacy, tensorflow, gensim).
+
+Usage (from OperationsExtraction folder):
+    python -m benchmarks.import_time [--limit 1.0] [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+MODULES = [
+    "operations_extractor",
+    "operations_extractor.utils",
+    "operations_extractor.conditions_extraction",
+    "operations_extractor.build_graph",
+    "operations_extractor.operations_extractor",
+]
+HEAVY_MODULES = ["spacy", "tensorflow", "gensim"]
+
+IMPORT_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(module, repeat):
+    package_folder = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    times, heavy = [], ""
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=package_folder, capture_output=True, text=True, check=True).stdout.split("\n")
+        times.append(float(output[0]))
+        heavy = output[1]
+    return min(times), heavy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=float, default=1.0, help="max import time in seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        import_time, heavy = measure(module, args.repeat)
+        status = "OK"
+        if import_time > args.limit or heavy:
+            status = "FAIL"
+            failed = True
+        print("%-45s %8.3f s  %s %s" % (module, import_time, status, ("loaded: " + heavy) if heavy else ""))
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,69 @@
+# coding=utf-8
+"""
+Accuracy/throughput comparison of spacy pipeline profiles for GraphBuilder.
+Operations tags are taken from the reference graphs of graph_test.json, so only
+parsing quality is compared: operation is correct if all its attributes match reference.
+
+Usage (from OperationsExtraction folder):
+    python -m benchmarks.spacy_profiles [--profiles accurate fast] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import time
+
+from operations_extractor.build_graph import GraphBuilder
+from operations_extractor.utils import SPACY_PROFILES, load_nlp, make_spacy_docs
+
+
+def reference_tags(data):
+    tags = [""] * len(data["tokens"])
+    for op in data["graph"]:
+        tags[op["op_id"]] = op["op_type"]
+    return tags
+
+
+def evaluate(profile, test_data, repeat, batch_size):
+    t = time.perf_counter()
+    nlp = load_nlp(profile)
+    load_time = time.perf_counter() - t
+
+    sentences = [data["tokens"] for data in test_data]
+    parse_time = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        docs = list(make_spacy_docs(sentences, batch_size=batch_size, nlp=nlp))
+        parse_time = min(parse_time or float("inf"), time.perf_counter() - t)
+
+    gb = GraphBuilder(nlp=nlp)
+    correct_ops, total_ops, correct_sents = 0, 0, 0
+    for doc, data in zip(docs, test_data):
+        graph = gb.build_graph(doc, reference_tags(data), data["materials"])
+        correct_sents += graph == data["graph"]
+        total_ops += len(data["graph"])
+        correct_ops += sum(op == correct_op for op, correct_op in zip(graph, data["graph"]))
+
+    return {"profile": profile,
+            "model": SPACY_PROFILES[profile]["model"],
+            "load_time": load_time,
+            "sents_per_sec": len(sentences) / parse_time,
+            "ops_accuracy": correct_ops / total_ops if total_ops else 0.0,
+            "sents_accuracy": correct_sents / len(test_data)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=list(SPACY_PROFILES))
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                                                       "graph_test.json"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    test_data = json.loads(open(args.data).read())
+
+    print("%-10s %-18s %10s %12s %10s %10s" % ("profile", "model", "load, s", "sents/s", "ops acc", "sents acc"))
+    for profile in args.profiles:
+        r = evaluate(profile, test_data, args.repeat, args.batch_size)
+        print("%-10s %-18s %10.2f %12.1f %10.3f %10.3f" % (r["profile"], r["model"], r["load_time"],
+                                                           r["sents_per_sec"], r["ops_accuracy"], r["sents_accuracy"]))
@@ -0,0 +1,24 @@
+# coding=utf-8
+import json
+
+from operations_extractor.pipeline import ParagraphPipeline
+pipeline = ParagraphPipeline(batch_size=64)
+
+test_data = json.loads(open('graph_test.json').read())
+
+# each sentence is parsed once, the Doc is shared by operations tagging and graph building
+for data, result in zip(test_data, pipeline.process(test_data)):
+    print(" ".join(data["tokens"]))
+    print(result["operations"])
+
+    correct_graph = data["graph"]
+    if result["graph"] != correct_graph:
+        for op, correct_op in zip(result["graph"], correct_graph):
+            if op != correct_op:
+                for k, v in correct_op.items():
+                    if op[k] != v:
+                        print ("\tOperation:", op["op_token"])
+                        print ("\tMismatch:", k, op[k], correct_op[k])
+    print ("-"*20)
+
+print ("Done!")
@@ -1,11 +1,18 @@
-from operations_extractor.conditions_extraction import get_times_toks, get_temperatures_toks, get_environment, tok2nums
+from operations_extractor.conditions_extraction import scan_conditions_toks, get_environment, tok2nums
 from operations_extractor.utils import make_spacy_tokens
 
 
 class GraphBuilder:
     def __init__(self,
-                 verbose=False):
+                 verbose=False,
+                 nlp=None):
+        """
+        :param verbose: print intermediate results
+        :param nlp: spacy Language to parse sentences given as strings,
+            shared model from utils.get_nlp() is loaded lazily if None
+        """
         self.__verbose = verbose
+        self.__nlp = nlp
 
     def __make_subsentences(self, spacy_toks, operations_tags):
         sub_sentences = []
@@ -72,7 +79,7 @@ class GraphBuilder:
 
         operations_seq = [(i, op) for i, op in enumerate(operations_tags) if op != ""]
         if operations_seq:
-            spacy_tokens = make_spacy_tokens(sentence_tokens)
+            spacy_tokens = make_spacy_tokens(sentence_tokens, self.__nlp)
 
             # print ("Tokens:", [(t.text, t.pos_, t.dep_) for t in spacy_tokens])
 
@@ -132,9 +139,8 @@ class GraphBuilder:
             # Finding mixing conditions and type
             # Mixing types: solid mix, solution mix, mix with liquid
             if op_type in ["MixingOperation", "HeatingOperation", "DryingOperation", "QuenchingOperation"]:
-                temp_toks = [t for t in get_temperatures_toks(sub_sent_text)]
-                time_toks = [t for t in
-                             get_times_toks(sub_sent_text)]  # TODO: check if more than one times value for mixing
+                # TODO: check if more than one times value for mixing
+                time_toks, temp_toks = scan_conditions_toks(sub_sent_text)
                 env_ids, env_toks = get_environment(sub_sent, mixing_materials)
 
             if self.__verbose:
@@ -1,29 +1,113 @@
 # coding=utf-8
+import numpy as np
 import regex as re
 
 
-def get_times_toks(sentence_toks):
+TIME_UNITS = {"h", "hr", "hrs", "min", "hour", "hours", "minutes", "d", "day", "days"}
+RATE_UNITS = ["/", "min-1", "h-1", "per"]
+
+__num_prefix_re = re.compile(r"^[0-9\-\.\,]*")
+__num_prefix_chars = list("0123456789-.,")
+# batch candidates are found on tokens truncated to this width: longer than any keyword ("overnight"),
+# so truncated tokens never equal a keyword, and a single long token does not widen the whole array
+__candidate_tok_width = len("overnight") + 1
+__time_unit_re = re.compile(r"[0-9\-\.\,]*\s*([hrsmind]*$)")
+__temperature_unit_re = re.compile(r"[0-9\-\.\,]*\s*([°KC]*$)")
+__tok_num_re = re.compile(r"([0-9\.\,]*)\s*[°A-Za-z]*")
+__tok_range_re = re.compile(r"([0-9\.\,\-]*)\s*[°A-Za-z]*")
+
+
+def __scan_token(sentence_toks, num, times, temperatures):
     """
-    Finds tokens corresponding to temperature values
-    Returns IDs
+    Checks if token num (not the last one) of sentence is time and/or temperature value
+    Appends found values to times and temperatures lists
+    """
+    tok = sentence_toks[num]
+    next_tok = sentence_toks[num + 1]
+    is_overnight = tok == "overnight"
+    is_days = next_tok == "days"
+    is_room = tok == "room" and sentence_toks[num - 1] != "from"
+
+    if is_overnight:
+        times.append({"tok_id": num, "value": "overnight", "units": "N/A"})
+    elif is_days:
+        times.append({"tok_id": num, "value": tok, "units": "day"})
+
+    if is_room:
+        temperatures.append({"tok_id": num, "value": "RT", "units": "N/A"})
+
+    # both values must start with number-like prefix, most of tokens are rejected here
+    tok_num = __num_prefix_re.match(tok).group().replace(",", "")
+    if tok_num == "":
+        return
+
+    if not is_overnight and not is_days:
+        tok_unit = __time_unit_re.search(tok).group(1) or next_tok
+        if all(t in "0987654321-,." for t in tok_num) and tok_unit in TIME_UNITS:
+            times.append({"tok_id": num, "value": tok_num, "units": tok_unit})
+
+    if not is_room:
+        tok_unit = __temperature_unit_re.search(tok).group(1) or next_tok
+        tok_unit = '°C' if tok_unit == '°' else tok_unit
+
+        # temperature token contains allowed symbols
+        # units of temperature
+        # units are not temperature rate
+        if all(t in "0987654321-." for t in tok_num) and all(t in "°KC" for t in tok_unit):
+            next_toks = "".join(sentence_toks[num + 1:num + 4])
+            if all(r not in next_toks for r in RATE_UNITS):
+                temperatures.append({"tok_id": num, "value": tok_num, "units": tok_unit})
+
+
+def scan_conditions_toks(sentence_toks):
+    """
+    Finds tokens corresponding to time and temperature values in one pass over sentence
+    Returns (times, temperatures) as get_times_toks() and get_temperatures_toks()
     """
     times = []
-    time_units = ["h", "hr", "hrs", "min", "hour", "hours", "minutes", "d", "day", "days"]
+    temperatures = []
+    for num in range(len(sentence_toks) - 1):
+        __scan_token(sentence_toks, num, times, temperatures)
 
-    for num, (tok, next_tok) in enumerate(zip(sentence_toks, sentence_toks[1:])):
-        if tok == "overnight":
-            times.append({"tok_id": num, "value": "overnight", "units": "N/A"})
-        elif next_tok == "days":
-            times.append({"tok_id": num, "value": tok, "units": "day"})
-        else:
-            tok_num = re.findall("(^[0-9\-\.\,]*)\s*[hrsmind]*", tok)[0].replace(",", "")
-            tok_unit = re.findall("[0-9\-\.\,]*\s*([hrsmind]*$)", tok)[0]
-            tok_unit = next_tok if tok_unit == "" else tok_unit
+    return times, temperatures
 
-            if tok_num != "" and all(t in "0987654321-,." for t in tok_num) and tok_unit in time_units:
-                times.append({"tok_id": num, "value": tok_num, "units": tok_unit})
 
-    return times
+def extract_conditions_batch(sentences_toks):
+    """
+    Finds time and temperature tokens for a batch of sentences
+    Candidate tokens (number-like, "overnight", "room", followed by "days") are marked
+    with array operations over all tokens of the batch, only candidates are checked further
+    Returns list of {"times": get_times_toks() output, "temperatures": get_temperatures_toks() output}
+    """
+    sentences_toks = [list(s) for s in sentences_toks]
+    results = [{"times": [], "temperatures": []} for _ in sentences_toks]
+
+    lengths = np.array([len(s) for s in sentences_toks], dtype=np.int64)
+    if lengths.sum() == 0:
+        return results
+    starts = np.cumsum(lengths) - lengths
+    toks = np.array([tok for s in sentences_toks for tok in s], dtype="U%i" % __candidate_tok_width)
+
+    candidates = np.isin(toks.astype("U1"), __num_prefix_chars) | (toks == "overnight") | (toks == "room")
+    candidates[:-1] |= toks[1:] == "days"
+    # last token of a sentence is never a value
+    candidates[(starts + lengths - 1)[lengths > 0]] = False
+
+    candidates_ids = np.flatnonzero(candidates)
+    candidates_sentences = np.searchsorted(starts, candidates_ids, side="right") - 1
+    for tok_id, sent_id in zip(candidates_ids.tolist(), candidates_sentences.tolist()):
+        __scan_token(sentences_toks[sent_id], tok_id - starts[sent_id],
+                     results[sent_id]["times"], results[sent_id]["temperatures"])
+
+    return results
+
+
+def get_times_toks(sentence_toks):
+    """
+    Finds tokens corresponding to time values
+    Returns IDs
+    """
+    return scan_conditions_toks(sentence_toks)[0]
 
 
 def get_temperatures_toks(sentence_toks):
@@ -31,29 +115,7 @@ def get_temperatures_toks(sentence_toks):
     Finds tokens corresponding to temperature values
     Returns IDs
     """
-    temperatures = []
-    rate_units = ["/", "min-1", "h-1", "per"]
-
-    for num, (tok, next_tok) in enumerate(zip(sentence_toks, sentence_toks[1:])):
-        if tok == "room" and sentence_toks[num - 1] != "from":
-            temperatures.append({"tok_id": num, "value": "RT", "units": "N/A"})
-        else:
-            tok_num = re.findall("(^[0-9\-\.\,]*)\s*[°KC]*", tok)[0].replace(",", "")
-            tok_unit = re.findall("[0-9\-\.\,]*\s*([°KC]*$)", tok)[0]
-            tok_unit = next_tok if tok_unit == "" else tok_unit
-            tok_unit = '°C' if tok_unit == '°' else tok_unit
-            next_toks = "".join([sentence_toks[i] for i in range(num + 1, num + 4) if i < len(sentence_toks)])
-
-            # temperature token contains allowed symbols
-            # units of temperature
-            # units are not temperature rate
-            if tok_num != "" \
-                    and all(t in "0987654321-." for t in tok_num) \
-                    and all(t in "°KC" for t in tok_unit) \
-                    and all(r not in next_toks for r in rate_units):
-                temperatures.append({"tok_id": num, "value": tok_num, "units": tok_unit})
-
-    return temperatures
+    return scan_conditions_toks(sentence_toks)[1]
 
 
 def get_environment(sentence, materials_):
@@ -117,7 +179,7 @@ def __get_temperatures_list(sentence_tokens, token):
     # print("->", current_id, current_tok, sentence["tokens"][temp_id-1])
 
     while current_id > 0 and __is_valid_temp_token(current_tok, units):
-        tok_num = re.sub("([0-9\.\,]*)\s*[°A-Za-z]*", "\\1", current_tok).replace(",", "")
+        tok_num = __tok_num_re.sub("\\1", current_tok).replace(",", "")
         if tok_num != "":
             temp_list.append((tok_num, current_id))
 
@@ -185,8 +247,8 @@ def __get_tok_values(sentence_tokens, token):
         temp_data["units"] = token["units"]
         return temp_data
 
-    token_num = re.sub("([0-9\.\,\-]*)\s*[°A-Za-z]*", "\\1", sentence_tokens[temp_id]).replace(",", "")
-    range_values = re.split("-", token_num)
+    token_num = __tok_range_re.sub("\\1", sentence_tokens[temp_id]).replace(",", "")
+    range_values = token_num.split("-")
 
     # single value
     if len(range_values) == 1:
@@ -211,7 +273,7 @@ def __get_tok_values(sentence_tokens, token):
 
     # "... ° -... °"
     if sentence_tokens[temp_id - 1] == "°" and value_1 == "":
-        value = re.sub("([0-9\.\,\-]*)\s*[°A-Za-z]*", "\\1", sentence_tokens[temp_id - 2]).replace(", ", "")
+        value = __tok_range_re.sub("\\1", sentence_tokens[temp_id - 2]).replace(", ", "")
         return {"max": float(value_2),
                 "min": float(value),
                 "values": [],
@@ -0,0 +1,99 @@
+# coding=utf-8
+import json
+import os
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+VOCAB_FILE = "vocab.json"
+
+
+class EmbeddingIndex:
+    """
+        contiguous token -> row id index over single float32 embeddings matrix
+        "<start>" and "<end>" share an extra all-zeros row, unknown tokens map to "<unk>" row
+    """
+    def __init__(self, token2id, vectors, unk_id, pad_id):
+        self.token2id = token2id
+        self.vectors = vectors
+        self.unk_id = unk_id
+        self.pad_id = pad_id
+
+    @classmethod
+    def from_word2vec(cls, w2v_model):
+        """
+            builds index from gensim Word2Vec model
+        :param w2v_model: loaded gensim Word2Vec model
+        :return: EmbeddingIndex
+        """
+        wv = w2v_model.wv
+        token2id = {word: vocab.index for word, vocab in wv.vocab.items()}
+        pad_id = len(wv.vectors)
+        vectors = np.zeros((pad_id + 1, wv.vectors.shape[1]), dtype='float32')
+        vectors[:pad_id] = wv.vectors
+
+        token2id["<start>"] = pad_id
+        token2id["<end>"] = pad_id
+
+        return cls(token2id, vectors, token2id["<unk>"], pad_id)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+            loads index exported by save()
+            with mmap=True vectors are memory-mapped read-only, so worker processes share one page-cached copy
+        :param path: folder with exported index
+        :param mmap: memory-map vectors instead of reading them into memory
+        :return: EmbeddingIndex
+        """
+        with open(os.path.join(path, VOCAB_FILE), encoding="utf-8") as f:
+            vocab = json.load(f)
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if mmap else None)
+
+        return cls(vocab["token2id"], vectors, vocab["unk_id"], vocab["pad_id"])
+
+    @staticmethod
+    def is_exported(path):
+        return os.path.isfile(os.path.join(path, VECTORS_FILE)) and os.path.isfile(os.path.join(path, VOCAB_FILE))
+
+    def save(self, path):
+        """
+            writes only vocabulary and vectors needed for inference
+        :param path: output folder
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, VECTORS_FILE), np.ascontiguousarray(self.vectors, dtype='float32'))
+        with open(os.path.join(path, VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump({"token2id": self.token2id, "unk_id": self.unk_id, "pad_id": self.pad_id}, f, ensure_ascii=False)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def get_ids(self, tokens):
+        """
+            maps tokens to rows of embeddings matrix
+        :param tokens: list of strings
+        :return: list of row ids
+        """
+        token2id = self.token2id
+        unk_id = self.unk_id
+        return [token2id.get(token, unk_id) for token in tokens]
+
+    def get_vectors(self, ids):
+        """
+            gathers embeddings for list of row ids
+        :param ids: list of row ids
+        :return: np.array of shape (len(ids), dim)
+        """
+        return self.vectors[ids]
+
+
+def export_embeddings(w2v_model_path, output_path):
+    """
+        exports inference part of gensim Word2Vec model into folder loadable with EmbeddingIndex.load()
+    :param w2v_model_path: path to saved Word2Vec model
+    :param output_path: output folder
+    """
+    from gensim.models import Word2Vec
+
+    EmbeddingIndex.from_word2vec(Word2Vec.load(w2v_model_path)).save(output_path)
@@ -2,10 +2,8 @@
 import os
 import numpy as np
 
-from gensim.models import Word2Vec
-from tensorflow import keras
-
-from operations_extractor.utils import replace_token_upd, make_spacy_tokens
+from operations_extractor.embeddings import EmbeddingIndex
+from operations_extractor.utils import replace_token_upd, make_spacy_tokens, make_spacy_docs
 
 os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 
@@ -13,15 +11,32 @@ os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 class OperationsExtractor:
     def __init__(self,
                  embedding_model = "models/w2v_embeddings_v1_words_solution",
-                 extractor_model = "models/Bi-RNN_cl7_ed100_2_solution_01_30_2021_3"
+                 extractor_model = "models/Bi-RNN_cl7_ed100_2_solution_01_30_2021_3",
+                 mmap_embeddings = True,
+                 nlp = None
                  ):
+        """
+        :param embedding_model: path to gensim Word2Vec model or to folder created by embeddings.export_embeddings()
+        :param extractor_model: path to keras classifier
+        :param mmap_embeddings: memory-map exported embeddings (shared between processes), ignored for Word2Vec model
+        :param nlp: spacy Language to parse sentences, shared model from utils.get_nlp() is loaded lazily if None
+        """
+        # heavy dependencies are imported here, so that importing the package stays cheap
+        from tensorflow import keras
 
         print("Operations Extractor v3.0.0")
 
         my_folder = os.path.dirname(os.path.realpath(__file__))
 
-        self.__embeddings = Word2Vec.load(os.path.join(my_folder, embedding_model))
+        embedding_model = os.path.join(my_folder, embedding_model)
+        if EmbeddingIndex.is_exported(embedding_model):
+            self.__embeddings_index = EmbeddingIndex.load(embedding_model, mmap=mmap_embeddings)
+        else:
+            from gensim.models import Word2Vec
+            self.__embeddings_index = EmbeddingIndex.from_word2vec(Word2Vec.load(embedding_model))
         self.__model = keras.models.load_model(os.path.join(my_folder, extractor_model))
+        self.__masked_model = None
+        self.__nlp = nlp
 
         # declare operation types
         self.__num2operation = {0: "",
@@ -32,39 +47,22 @@ class OperationsExtractor:
                                 5: 'ShapingOperation',
                                 6: 'QuenchingOperation'}
         self._num_classes = 7
-        self.__input_word_dim = self.__embeddings.trainables.layer1_size
+        self.__input_word_dim = self.__embeddings_index.dim
 
         print("Done initialization.")
 
-    def __get_embeddings(self, word):
-        """
-            returns Word2Vec embedding from gensim for single word token
-        :param word: single word token
-        :return: Word2Vec embedding
-        """
-
-        if word in ["<start>", "<end>"]:
-            return np.zeros(self.__input_word_dim, dtype=float)
-
-        if word in self.__embeddings.wv.vocab:
-            return self.__embeddings.wv.__getitem__(word)
-        else:
-            return self.__embeddings.wv.__getitem__("<unk>")
-
     def __get_sentence_vector(self, spacy_tokens):
         """
             vectorizes input sentence tokens using loaded spacy nlp model
         :param sentence_toks: tokens from given sentence
         :return: vectorized sentence using Word2Vec embeddings
         """
-        input_sentences_data = np.zeros((1, len(spacy_tokens) + 2, self.__input_word_dim), dtype='float32')
-        input_sentences_data[0, 0] = self.__get_embeddings("<start>")
-        for t, word in enumerate(spacy_tokens):
-            embed_vec = self.__get_embeddings(replace_token_upd(word, mode=""))
-            input_sentences_data[0, t] = embed_vec
-        input_sentences_data[0, -1] = self.__get_embeddings("<end>")
+        # token t is placed at row t followed by two all-zeros rows for "<end>",
+        # (same layout as the original per-token vectorization)
+        tokens_ids = self.__embeddings_index.get_ids([replace_token_upd(word, mode="") for word in spacy_tokens])
+        tokens_ids.extend([self.__embeddings_index.pad_id] * 2)
 
-        return input_sentences_data
+        return self.__embeddings_index.get_vectors(tokens_ids)[np.newaxis]
 
     def get_operations_labels(self, sentence):
         """
@@ -72,9 +70,63 @@ class OperationsExtractor:
         :param sentence: can be text string, list of text tokens or spacy processed tokens
         :return: list of operations
         """
-        spacy_tokens = make_spacy_tokens(sentence)
+        spacy_tokens = make_spacy_tokens(sentence, self.__nlp)
         sentence_vector = self.__get_sentence_vector(spacy_tokens)
         prediction = self.__model.predict(sentence_vector)[0]
         tags_predicted = [self.__num2operation[np.argmax(v)] for v in prediction][0:len(spacy_tokens)]
 
         return tags_predicted
+
+    def __get_masked_model(self):
+        """
+            wraps layers of the loaded classifier into model accepting explicit timesteps mask,
+            so that padded timesteps do not change the state of the recurrent layer
+        :return: keras model with inputs [sentences_vectors, mask]
+        """
+        if self.__masked_model is None:
+            from tensorflow import keras
+
+            inputs = keras.Input(shape=(None, self.__input_word_dim), dtype='float32')
+            mask = keras.Input(shape=(None,), dtype='bool')
+            outputs = inputs
+            for layer in self.__model.layers:
+                if isinstance(layer, keras.layers.InputLayer):
+                    continue
+                if isinstance(layer, (keras.layers.Bidirectional, keras.layers.RNN)):
+                    outputs = layer(outputs, mask=mask)
+                else:
+                    outputs = layer(outputs)
+            self.__masked_model = keras.Model(inputs=[inputs, mask], outputs=outputs)
+
+        return self.__masked_model
+
+    def get_operations_labels_batch(self, sentences, batch_size=64):
+        """
+            finds operations for a batch of sentences
+            sentences are sorted by length and grouped into buckets of batch_size,
+            each bucket is padded to the longest sentence and classified with single predict call
+        :param sentences: list of sentences, each can be text string, list of text tokens or spacy processed tokens
+        :param batch_size: max number of sentences in one bucket
+        :return: list of operations lists, same order as sentences
+        """
+        sentences_tokens = list(make_spacy_docs(sentences, batch_size=batch_size, nlp=self.__nlp))
+        order = sorted(range(len(sentences_tokens)), key=lambda i: len(sentences_tokens[i]))
+
+        tags_predicted = [[] for _ in sentences_tokens]
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            max_len = max(len(sentences_tokens[i]) for i in bucket) + 2
+
+            bucket_data = np.zeros((len(bucket), max_len, self.__input_word_dim), dtype='float32')
+            bucket_mask = np.zeros((len(bucket), max_len), dtype=bool)
+            for b, i in enumerate(bucket):
+                sentence_len = len(sentences_tokens[i]) + 2
+                bucket_data[b, :sentence_len] = self.__get_sentence_vector(sentences_tokens[i])[0]
+                bucket_mask[b, :sentence_len] = True
+
+            prediction = self.__get_masked_model().predict([bucket_data, bucket_mask], batch_size=len(bucket))
+            for b, i in enumerate(bucket):
+                tags_predicted[i] = [self.__num2operation[np.argmax(v)]
+                                     for v in prediction[b]][0:len(sentences_tokens[i])]
+
+        return tags_predicted
@@ -0,0 +1,78 @@
+# coding=utf-8
+import itertools
+
+from operations_extractor.build_graph import GraphBuilder
+from operations_extractor.utils import make_spacy_docs
+
+
+class ParagraphPipeline:
+    def __init__(self,
+                 operations_extractor=None,
+                 graph_builder=None,
+                 nlp=None,
+                 batch_size=64,
+                 n_process=1):
+        """
+        End-to-end extraction: each sentence is parsed by spacy once and the Doc is shared
+        between operations tagging and graph building
+        :param operations_extractor: OperationsExtractor, created if None
+        :param graph_builder: GraphBuilder, created if None
+        :param nlp: spacy Language, shared model from utils.get_nlp() is used if None
+        :param batch_size: number of sentences parsed and tagged at once
+        :param n_process: number of processes used by spacy
+        """
+        if operations_extractor is None:
+            from operations_extractor.operations_extractor import OperationsExtractor
+            operations_extractor = OperationsExtractor(nlp=nlp)
+
+        self.__oe = operations_extractor
+        self.__gb = graph_builder or GraphBuilder(nlp=nlp)
+        self.__nlp = nlp
+        self.__batch_size = batch_size
+        self.__n_process = n_process
+
+    @staticmethod
+    def __get_sentence(item):
+        return item["tokens"] if isinstance(item, dict) else item
+
+    @staticmethod
+    def __get_materials(item):
+        return item.get("materials", []) if isinstance(item, dict) else []
+
+    def process(self, sentences):
+        """
+            extracts operations and synthesis graph for stream of sentences
+        :param sentences: iterable of sentences, each is either text string, list of text tokens, spacy Doc
+            or dict {"tokens": sentence, "materials": list of {"text": material, "tok_ids": list of tok ids}}
+        :return: generator of dict(doc=spacy Doc, operations=list of tags, graph=GraphBuilder.build_graph output),
+            same order as sentences
+        """
+        items, to_parse = itertools.tee(sentences)
+        docs = make_spacy_docs((self.__get_sentence(item) for item in to_parse),
+                               batch_size=self.__batch_size,
+                               n_process=self.__n_process,
+                               nlp=self.__nlp)
+        items_docs = zip(items, docs)
+
+        while True:
+            chunk = list(itertools.islice(items_docs, self.__batch_size))
+            if not chunk:
+                break
+
+            operations = self.__oe.get_operations_labels_batch([doc for _, doc in chunk],
+                                                               batch_size=self.__batch_size)
+            for (item, doc), sentence_operations in zip(chunk, operations):
+                graph = self.__gb.build_graph(doc, sentence_operations, self.__get_materials(item))
+                yield dict(doc=doc, operations=sentence_operations, graph=graph)
+
+    def process_paragraphs(self, paragraphs):
+        """
+            same as process() for stream of paragraphs
+        :param paragraphs: iterable of lists of sentences
+        :return: generator of lists of process() outputs, one list per paragraph
+        """
+        paragraphs, paragraphs_sentences = itertools.tee(paragraphs)
+        results = self.process(sentence for paragraph in paragraphs_sentences for sentence in paragraph)
+
+        for paragraph in paragraphs:
+            yield [next(results) for _ in paragraph]
@@ -0,0 +1,201 @@
+# coding=utf-8
+"""
+Multi-process runner of operations extraction over corpus shards.
+
+Input shards are JSON arrays (.json) or JSON lines (.jsonl) of sentences in graph_test.json schema:
+    {"tokens": list of tokens, "materials": list of {"text": material, "tok_ids": list of tok ids}, ...}
+For every shard, output_folder/<shard name>-<path key>.jsonl gets one line per input sentence, in the input order:
+    input sentence dict with "operations" and "graph" set to the extracted values
+<path key> is derived from the absolute path of the shard, so shards with the same name in different folders
+do not share output.
+
+Output is written incrementally. Restarted run skips finished shards (marked with <shard name>-<path key>.done file)
+and continues unfinished shards from the last written sentence.
+
+Usage:
+    python -m operations_extractor.runner shard_1.jsonl shard_2.json ... -o output_folder --workers 8
+"""
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+
+from operations_extractor.utils import DEFAULT_SPACY_PROFILE, SPACY_PROFILES
+
+_pipeline = None
+
+
+def _init_worker(extractor_args, spacy_profile, batch_size):
+    """
+        creates models once per worker process
+    """
+    global _pipeline
+    from operations_extractor.operations_extractor import OperationsExtractor
+    from operations_extractor.pipeline import ParagraphPipeline
+    from operations_extractor.utils import load_nlp
+
+    nlp = load_nlp(spacy_profile)
+    _pipeline = ParagraphPipeline(OperationsExtractor(nlp=nlp, **extractor_args), nlp=nlp, batch_size=batch_size)
+
+
+def _process_chunk(records):
+    results = []
+    for record, result in zip(records, _pipeline.process(records)):
+        record = dict(record)
+        record["operations"] = result["operations"]
+        record["graph"] = result["graph"]
+        results.append(record)
+    return results
+
+
+def read_shard(shard_path):
+    """
+        reads sentences from JSON array or JSON lines file
+    :param shard_path: path to shard
+    :return: generator of dict
+    """
+    with open(shard_path, encoding="utf-8") as f:
+        if shard_path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def _output_name(shard_path):
+    """
+        name of output and checkpoint files of the shard: shard name and hash of its absolute path
+    """
+    shard_name = os.path.splitext(os.path.basename(shard_path))[0]
+    path_key = hashlib.sha1(os.path.abspath(shard_path).encode("utf-8")).hexdigest()[:10]
+    return "%s-%s" % (shard_name, path_key)
+
+
+def _resume_position(output_path, block_size=1 << 20):
+    """
+        counts complete lines in output file, incomplete last line (crashed write) is truncated
+        the file is read in blocks of block_size bytes, the last line is searched from the end
+    :return: number of already processed sentences
+    """
+    if not os.path.exists(output_path):
+        return 0
+
+    with open(output_path, "rb+") as f:
+        length = f.seek(0, os.SEEK_END)
+        complete_length = length
+        while complete_length > 0:
+            start = max(0, complete_length - block_size)
+            f.seek(start)
+            newline = f.read(complete_length - start).rfind(b"\n")
+            if newline >= 0:
+                complete_length = start + newline + 1
+                break
+            complete_length = start
+        if complete_length < length:
+            f.truncate(complete_length)
+
+        f.seek(0)
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(block_size), b""))
+
+
+def _chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _imap_bounded(pool, func, iterable, max_pending):
+    """
+        like pool.imap, but input is read only max_pending tasks ahead of the consumer,
+        so memory does not grow with the shard size
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def run(shards, output_folder, workers=1, chunk_size=256, batch_size=64,
+        spacy_profile=DEFAULT_SPACY_PROFILE, extractor_args=None):
+    """
+        runs operations extraction over shards
+    :param shards: list of paths to input shards
+    :param output_folder: folder for results and checkpoints
+    :param workers: number of worker processes, each loads its own models
+    :param chunk_size: number of sentences sent to worker at once, at most two chunks per worker are in flight
+    :param batch_size: number of sentences parsed and tagged at once by worker
+    :param spacy_profile: name of profile from utils.SPACY_PROFILES
+    :param extractor_args: dict of keyword arguments for OperationsExtractor
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    init_args = (extractor_args or {}, spacy_profile, batch_size)
+
+    pool = None
+    if workers > 1:
+        # spawn: tensorflow and torch are not fork-safe
+        pool = multiprocessing.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=init_args)
+    else:
+        _init_worker(*init_args)
+
+    try:
+        for shard_path in shards:
+            output_name = _output_name(shard_path)
+            output_path = os.path.join(output_folder, output_name + ".jsonl")
+            done_path = os.path.join(output_folder, output_name + ".done")
+            if os.path.exists(done_path):
+                print("Skipping finished shard:", shard_path)
+                continue
+
+            processed = _resume_position(output_path)
+            print("Processing shard: %s (resuming from sentence %i)" % (shard_path, processed))
+
+            chunks = _chunks(itertools.islice(read_shard(shard_path), processed, None), chunk_size)
+            if pool:
+                results = _imap_bounded(pool, _process_chunk, chunks, 2 * workers)
+            else:
+                results = map(_process_chunk, chunks)
+            with open(output_path, "a", encoding="utf-8") as f:
+                for chunk_results in results:
+                    f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in chunk_results))
+                    f.flush()
+                    processed += len(chunk_results)
+
+            open(done_path, "w").close()
+            print("Done shard: %s (%i sentences)" % (shard_path, processed))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Operations extraction over corpus shards")
+    parser.add_argument("shards", nargs="+", help="JSON or JSON lines files in graph_test.json schema")
+    parser.add_argument("-o", "--output", required=True, help="output folder")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--spacy-profile", default=DEFAULT_SPACY_PROFILE, choices=list(SPACY_PROFILES))
+    parser.add_argument("--embedding-model", default=None, help="Word2Vec model or exported embeddings folder")
+    args = parser.parse_args()
+
+    extractor_args = {}
+    if args.embedding_model:
+        extractor_args["embedding_model"] = os.path.abspath(args.embedding_model)
+
+    run(args.shards, args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        spacy_profile=args.spacy_profile,
+        extractor_args=extractor_args)
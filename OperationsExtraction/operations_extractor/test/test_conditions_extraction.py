@@ -0,0 +1,43 @@
+# coding=utf-8
+import json
+import os
+
+from operations_extractor.conditions_extraction import extract_conditions_batch, scan_conditions_toks
+
+GRAPH_TEST = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+                          "graph_test.json")
+
+SENTENCES = [
+    [],
+    ["stirred"],
+    ["The", "solution", "was", "stirred", "overnight", "at", "room", "temperature", "."],
+    ["heated", "from", "room", "temperature", "to", "80", "°C", "for", "3", "days"],
+    ["aged", "for", "2", "days", "at", "60", "°", "C", "."],
+    ["dried", "at", "100", "°C", "for", "12h", "and", "calcined", "at", "500", "°C", "for", "2", "h"],
+    ["heated", "to", "700", "°C", "at", "5", "°C", "/", "min", "and", "kept", "for", "30", "min"],
+    ["annealed", "at", "800-900", "°C", "for", "1,5", "hours", "under", "Ar"],
+    ["overnightly", "roomy", "daysx", "2", "daysx", "-10", "K"],
+    ["see", "http://example.com/" + "a" * 5000, "for", "24", "h", "at", "25", "°C"],
+    ["garbled", "cell", "1" * 3000, "h", ",", "." * 2000, "°C", "at", "37", "°C"],
+]
+
+
+def _scan(sentences):
+    return [{"times": times, "temperatures": temperatures}
+            for times, temperatures in map(scan_conditions_toks, sentences)]
+
+
+def test_batch_equals_scan():
+    assert extract_conditions_batch(SENTENCES) == _scan(SENTENCES)
+
+
+def test_batch_equals_scan_on_graph_test():
+    with open(GRAPH_TEST, encoding="utf-8") as f:
+        test_data = json.load(f)
+    sentences = [data["tokens"][i:] for data in test_data for i in range(len(data["tokens"]))]
+    assert extract_conditions_batch(sentences) == _scan(sentences)
+
+
+def test_batch_of_empty_sentences():
+    assert extract_conditions_batch([[], []]) == [{"times": [], "temperatures": []}] * 2
+    assert extract_conditions_batch([]) == []
@@ -0,0 +1,71 @@
+# coding=utf-8
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+spacy = pytest.importorskip("spacy")
+
+from operations_extractor.embeddings import EmbeddingIndex
+from operations_extractor.operations_extractor import OperationsExtractor
+
+WORDS = ["the", "solution", "was", "stirred", "heated", "dried", "at", "for", "<num>", "h", "°c", "and", "then",
+         "mixed", "with", "water", "calcined", "pressed", "into", "pellets", "quenched", ".", "<unk>"]
+EMBEDDING_DIM = 8
+
+SENTENCES = [
+    ["stirred"],
+    ["The", "solution", "was", "stirred", "for", "12", "h", "."],
+    ["dried", "at", "80", "°C"],
+    ["heated", "at", "500", "°C", "for", "2", "h", "and", "then", "quenched", "in", "water", "."],
+    ["mixed", "with", "water"],
+    ["calcined", "at", "900", "°C", ",", "pressed", "into", "pellets", "and", "heated", "again", "at", "1200",
+     "°C", "for", "24", "h", "and", "quenched", "."],
+    ["The", "solution", "was", "dried", "."],
+]
+
+
+@pytest.fixture(scope="module")
+def extractor(tmp_path_factory):
+    # tiny untrained Bi-SimpleRNN tagger with the layout of the bundled classifier
+    folder = tmp_path_factory.mktemp("models")
+    rnd = np.random.RandomState(0)
+
+    token2id = {word: i for i, word in enumerate(WORDS)}
+    pad_id = len(WORDS)
+    token2id["<start>"] = pad_id
+    token2id["<end>"] = pad_id
+    vectors = np.zeros((pad_id + 1, EMBEDDING_DIM), dtype="float32")
+    vectors[:pad_id] = rnd.normal(size=(pad_id, EMBEDDING_DIM))
+    EmbeddingIndex(token2id, vectors, token2id["<unk>"], pad_id).save(str(folder / "embeddings"))
+
+    tf.random.set_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(None, EMBEDDING_DIM)),
+        # non-zero bias: without mask, all-zeros padding would change the backward state
+        tf.keras.layers.Bidirectional(tf.keras.layers.SimpleRNN(16, return_sequences=True,
+                                                                bias_initializer="random_normal")),
+        tf.keras.layers.Dense(7, activation="softmax", bias_initializer="random_normal"),
+    ])
+    model.save(str(folder / "classifier.h5"))
+
+    return OperationsExtractor(embedding_model=str(folder / "embeddings"),
+                               extractor_model=str(folder / "classifier.h5"),
+                               nlp=spacy.blank("en"))
+
+
+def test_batch_equals_single_sentence(extractor):
+    single = [extractor.get_operations_labels(sentence) for sentence in SENTENCES]
+    assert [len(tags) for tags in single] == [len(sentence) for sentence in SENTENCES]
+    assert len({tag for tags in single for tag in tags}) > 1
+
+    # buckets of 3 mix sentences of different lengths, so most of them are padded
+    for batch_size in (1, 3, 64):
+        assert extractor.get_operations_labels_batch(SENTENCES, batch_size=batch_size) == single, batch_size
+
+
+def test_batch_keeps_order(extractor):
+    sentences = SENTENCES[::-1] + SENTENCES
+    expected = [extractor.get_operations_labels(sentence) for sentence in sentences]
+
+    assert extractor.get_operations_labels_batch(sentences, batch_size=4) == expected
+    assert extractor.get_operations_labels_batch([]) == []
@@ -1,7 +1,16 @@
-import spacy
+import itertools
 
-nlp = spacy.load('en_core_web_trf')
-#spacy.prefer_gpu()
+# spacy pipelines profiles: model and components excluded from pipeline
+# GraphBuilder needs only tagger (pos_), parser (dep_, subtree) and lemmatizer (lemma_)
+SPACY_PROFILES = {
+    "full": {"model": "en_core_web_trf", "exclude": []},
+    "accurate": {"model": "en_core_web_trf", "exclude": ["ner"]},
+    "fast": {"model": "en_core_web_sm", "exclude": ["ner"]},
+}
+# "full" keeps the pipeline of previous versions, "accurate"/"fast" are opt-in
+DEFAULT_SPACY_PROFILE = "full"
+
+_nlp = None
 
 elements_1 = ['H', 'B', 'C', 'N', 'O', 'F', 'P', 'S', 'K', 'V', 'Y', 'I', 'W', 'U']
 elements_2 = ['He', 'Li', 'Be', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'Cl', 'Ar', 'Ca', 'Sc', 'Ti', 'Cr',
@@ -14,17 +23,79 @@ elements_2 = ['He', 'Li', 'Be', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'Cl', 'Ar', 'Ca',
 num_set = set("0987654321+-()[]")
 
 
-def make_spacy_tokens(sentence):
-    if isinstance(sentence, spacy.tokens.doc.Doc):
+def load_nlp(profile=DEFAULT_SPACY_PROFILE):
+    """
+        loads spacy model according to the profile
+    :param profile: name of profile from SPACY_PROFILES
+    :return: spacy Language
+    """
+    import spacy
+    #spacy.prefer_gpu()
+
+    if profile not in SPACY_PROFILES:
+        raise ValueError('Unknown spacy profile: %s. Available profiles: %s'
+                         % (profile, ", ".join(SPACY_PROFILES)))
+    return spacy.load(SPACY_PROFILES[profile]["model"], exclude=SPACY_PROFILES[profile]["exclude"])
+
+
+def get_nlp():
+    """
+        returns shared spacy model, the model is loaded with default profile on first call
+    :return: spacy Language
+    """
+    global _nlp
+    if _nlp is None:
+        _nlp = load_nlp()
+    return _nlp
+
+
+def set_nlp(nlp):
+    """
+        replaces shared spacy model, e.g. with already loaded one
+    :param nlp: spacy Language or None (model is loaded again on next use)
+    """
+    global _nlp
+    _nlp = nlp
+
+
+def make_spacy_docs(sentences, batch_size=64, n_process=1, nlp=None):
+    """
+        parses stream of sentences with spacy nlp.pipe
+        pre-tokenized sentences are converted into Doc directly, shared pipeline is not modified
+    :param sentences: iterable of sentences, each can be text string, list of text tokens
+        or spacy processed tokens (returned as is)
+    :param batch_size: number of sentences passed to spacy at once
+    :param n_process: number of processes used by spacy
+    :param nlp: spacy Language to use instead of shared model
+    :return: generator of spacy Doc, same order as sentences
+    """
+    from spacy.tokens import Doc
+
+    nlp = nlp or get_nlp()
+    sentences, to_parse = itertools.tee(sentences)
+    parsed = nlp.pipe((Doc(nlp.vocab, words=s) if isinstance(s, list) else s
+                       for s in to_parse if isinstance(s, (str, list))),
+                      batch_size=batch_size,
+                      n_process=n_process)
+
+    for sentence in sentences:
+        yield next(parsed) if isinstance(sentence, (str, list)) else sentence
+
+
+def make_spacy_tokens(sentence, nlp=None):
+    """
+        parses sentence with spacy
+    :param sentence: can be text string, list of text tokens or spacy processed tokens (returned as is)
+    :param nlp: spacy Language to use instead of shared model
+    :return: spacy Doc
+    """
+    if not isinstance(sentence, (str, list)):
         return sentence
 
-    def upd_tokenizer(text):
-        text_toks = text.split("|+|")
-        return spacy.tokens.Doc(nlp.vocab, words=text_toks)
-
+    nlp = nlp or get_nlp()
     if isinstance(sentence, list):
-        nlp.tokenizer = upd_tokenizer
-        return nlp("|+|".join(sentence))
+        from spacy.tokens import Doc
+        return nlp(Doc(nlp.vocab, words=sentence))
 
     return nlp(sentence)
 
@@ -16,7 +16,7 @@ setup(name='operations_extractor',
                     },
       include_package_data=True,
       install_requires=[
-          "spacy>=3.0.0",
+          "spacy>=3.2.0",
           "gensim==3.8.0",
           "tensorflow==2.3",
           "regex",
@@ -0,0 +1,240 @@
+"""
+Binary cache of the solution-synthesis dataset with random access.
+
+The cache is a single file of length-prefixed msgpack records followed
+by an offset index. It is opened with mmap, so any recipe is read in
+O(1) by position, DOI or paragraph without scanning the dump, and worker
+processes share one page-cached copy.
+
+A paragraph is identified by DOI and paragraph id: the number of the
+paragraph (distinct paragraph_string) in the paper, in dataset order.
+
+    python dataset_binary.py solution-synthesis_dataset_2021-8-5.json dataset.bin
+
+    from dataset_binary import RecipeCache
+
+    with RecipeCache("dataset.bin") as cache:
+        recipes = cache.get_by_doi("10.1016/j.jallcom.2016.01.162")
+        recipes = cache.get_by_paragraph("10.1016/j.jallcom.2016.01.162", 0)
+        for recipe in cache.iter_shard(0, 8):
+            ...
+
+Requires msgpack.
+"""
+import argparse
+import mmap
+import os
+import struct
+
+import msgpack
+
+from dataset_reader import read_raw, to_entry
+
+__all__ = ['build_cache', 'RecipeCache']
+
+MAGIC = b'SSYNBIN2'
+_LENGTH = struct.Struct('<I')
+_FOOTER = struct.Struct('<Q8s')  # index offset, magic
+
+
+def build_cache(records, path):
+    """
+        writes dataset records into binary cache
+    :param records: iterable of dataset records as dicts, e.g. dataset_reader.read_raw()
+    :param path: output file
+    :return: number of records written
+    """
+    packer = msgpack.Packer(use_bin_type=True)
+    offsets = []
+    dois = []
+    paragraph_ids = []
+    paragraphs = {}  # {doi: {paragraph_string: paragraph id}}
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        offset = len(MAGIC)
+        for record in records:
+            payload = packer.pack(record)
+            f.write(_LENGTH.pack(len(payload)))
+            f.write(payload)
+            offsets.append(offset)
+            doi = record.get('doi')
+            doi_paragraphs = paragraphs.setdefault(doi, {})
+            dois.append(doi)
+            paragraph_ids.append(doi_paragraphs.setdefault(record.get('paragraph_string'), len(doi_paragraphs)))
+            offset += _LENGTH.size + len(payload)
+
+        f.write(packer.pack({'offsets': offsets, 'dois': dois, 'paragraph_ids': paragraph_ids,
+                             # list of [doi, paragraph strings], DOI can be null, which is not a valid map key
+                             'paragraphs': [[doi, list(doi_paragraphs)] for doi, doi_paragraphs in paragraphs.items()]}))
+        f.write(_FOOTER.pack(offset, MAGIC))
+    return len(offsets)
+
+
+class RecipeCache:
+    def __init__(self, path):
+        """
+        Read-only view of binary cache written by build_cache()
+        :param path: cache file
+        """
+        self.path = path
+        self.__file = open(path, 'rb')
+        size = os.fstat(self.__file.fileno()).st_size
+        if size < len(MAGIC) + _FOOTER.size:
+            self.__file.close()
+            raise ValueError('%s is not a recipe cache file: too short (%i bytes)' % (path, size))
+        self.__mm = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        index_end = size - _FOOTER.size
+        index_offset, magic = _FOOTER.unpack_from(self.__mm, index_end)
+        if self.__mm[:len(MAGIC)] != MAGIC or magic != MAGIC:
+            self.close()
+            raise ValueError('%s is not a recipe cache file, truncated or written by another version' % path)
+        if not len(MAGIC) <= index_offset <= index_end:
+            self.close()
+            raise ValueError('%s is not a recipe cache file: index offset out of range' % path)
+
+        index = msgpack.unpackb(self.__mm[index_offset:index_end], raw=False)
+        self.__offsets = index['offsets']
+        self.__dois = index['dois']
+        self.__paragraph_ids = index['paragraph_ids']
+        self.__paragraphs = {doi: doi_paragraphs for doi, doi_paragraphs in index['paragraphs']}
+        self.__by_doi = {}
+        self.__by_paragraph = {}
+        for i, (doi, paragraph_id) in enumerate(zip(self.__dois, self.__paragraph_ids)):
+            self.__by_doi.setdefault(doi, []).append(i)
+            self.__by_paragraph.setdefault((doi, paragraph_id), []).append(i)
+
+    def __reduce__(self):
+        # workers reopen the file instead of pickling the mapping
+        return self.__class__, (self.path,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.__mm.close()
+        self.__file.close()
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def __read(self, i):
+        offset = self.__offsets[i]
+        length, = _LENGTH.unpack_from(self.__mm, offset)
+        start = offset + _LENGTH.size
+        return msgpack.unpackb(self.__mm[start:start + length], raw=False)
+
+    def __getitem__(self, i):
+        """
+            reads record by position, slices return lists
+        :param i: int or slice
+        :return: dict of dataset record
+        """
+        if isinstance(i, slice):
+            return [self.__read(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('recipe index out of range')
+        return self.__read(i)
+
+    def __iter__(self):
+        return self.iter_range(0, len(self))
+
+    @property
+    def dois(self):
+        """
+            list of DOI of every record, in record order
+        """
+        return self.__dois
+
+    def positions(self, doi):
+        """
+        :param doi: DOI of the paper
+        :return: list of positions of records of the paper
+        """
+        return list(self.__by_doi.get(doi, []))
+
+    def get_by_doi(self, doi):
+        """
+        :param doi: DOI of the paper
+        :return: list of records of the paper, empty if DOI is not in the cache
+        """
+        return [self.__read(i) for i in self.__by_doi.get(doi, [])]
+
+    def paragraphs(self, doi):
+        """
+        :param doi: DOI of the paper
+        :return: list of paragraph_string of the paragraphs of the paper, paragraph id is the position
+        """
+        return list(self.__paragraphs.get(doi, []))
+
+    def paragraph_id(self, i):
+        """
+        :param i: position of record
+        :return: paragraph id of the record within its paper
+        """
+        return self.__paragraph_ids[i]
+
+    def paragraph_positions(self, doi, paragraph_id):
+        """
+        :param doi: DOI of the paper
+        :param paragraph_id: paragraph id, see paragraphs()
+        :return: list of positions of records of the paragraph
+        """
+        return list(self.__by_paragraph.get((doi, paragraph_id), []))
+
+    def get_by_paragraph(self, doi, paragraph_id):
+        """
+        :param doi: DOI of the paper
+        :param paragraph_id: paragraph id, see paragraphs()
+        :return: list of records of the paragraph, empty if it is not in the cache
+        """
+        return [self.__read(i) for i in self.__by_paragraph.get((doi, paragraph_id), [])]
+
+    def entry(self, i, fields=None):
+        """
+            reads record by position as ReactionEntry
+        :param i: position of record
+        :param fields: list of dotted field paths, see dataset_reader.read_dataset()
+        :return: ReactionEntry
+        """
+        return to_entry(self[i], fields)
+
+    def iter_range(self, start, stop):
+        """
+        :return: generator of records in positions [start, stop)
+        """
+        for i in range(start, min(stop, len(self))):
+            yield self.__read(i)
+
+    def shard_bounds(self, shard, n_shards):
+        """
+            splits records into n_shards contiguous shards of almost equal size
+        :param shard: shard number, 0 <= shard < n_shards
+        :param n_shards: number of shards
+        :return: (start, stop) positions of the shard
+        """
+        if not 0 <= shard < n_shards:
+            raise ValueError('shard must be in [0, %i)' % n_shards)
+        size, rest = divmod(len(self), n_shards)
+        start = shard * size + min(shard, rest)
+        return start, start + size + (1 if shard < rest else 0)
+
+    def iter_shard(self, shard, n_shards):
+        """
+        :return: generator of records of the shard, see shard_bounds()
+        """
+        return self.iter_range(*self.shard_bounds(shard, n_shards))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Builds binary cache of the dataset JSON dump')
+    parser.add_argument('dataset', help='dataset JSON dump')
+    parser.add_argument('output', help='output cache file')
+    args = parser.parse_args()
+
+    print('Written %i recipes' % build_cache(read_raw(args.dataset), args.output))
@@ -0,0 +1,286 @@
+"""
+Columnar (Parquet) export of the solution-synthesis dataset.
+
+ReactionEntry records are flattened into normalized tables, every table
+has recipe_id column:
+
+    recipes           one row per recipe
+    materials         targets and precursors (role column), material_id
+    compositions      components of materials, composition_id
+    element_amounts   elements of compositions, with role of the material
+    operations        operations with scalar conditions, operation_id
+    condition_values  temperature/time values of operations (kind column)
+    quantities        quantities of materials, quantity_id
+    quantity_values   numbers and units of quantities
+
+    from dataset_reader import read_dataset
+    from dataset_columnar import export_parquet, load_tables, read_parquet
+
+    export_parquet(read_dataset("solution-synthesis_dataset_2021-8-5.json"), "dataset_parquet")
+    elements = load_tables("dataset_parquet", ["element_amounts"])["element_amounts"]
+    for entry in read_parquet("dataset_parquet"):
+        ...
+
+Requires pyarrow.
+"""
+import json
+import os
+from collections import defaultdict
+
+from dataset_typing import Formula, Material, Operation, Quantity, ReactionEntry
+
+__all__ = ['TABLES', 'export_parquet', 'load_tables', 'read_parquet']
+
+TABLES = ('recipes', 'materials', 'compositions', 'element_amounts', 'operations', 'condition_values',
+          'quantities', 'quantity_values')
+
+CONDITION_KINDS = ('temperature', 'time')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is required for columnar export: pip install pyarrow')
+    return pyarrow
+
+
+def _schemas(pa):
+    strings = pa.list_(pa.string())
+    return {
+        'recipes': pa.schema([
+            ('recipe_id', pa.int64()), ('doi', pa.string()), ('paragraph_string', pa.string()),
+            ('reaction', pa.string()),  # JSON of {"left_side", "right_side"}
+            ('reaction_string', pa.string()), ('targets_string', strings), ('solvents_string', strings),
+            ('type', pa.string())]),
+        'materials': pa.schema([
+            ('recipe_id', pa.int64()), ('material_id', pa.int64()), ('role', pa.string()),
+            ('material_string', pa.string()), ('material_name', pa.string()), ('material_formula', pa.string()),
+            ('phase', pa.string()), ('is_acronym', pa.bool_()),
+            ('amounts_vars', pa.string()), ('elements_vars', pa.string()),  # JSON
+            ('additives', strings), ('oxygen_deficiency', pa.string()), ('mp_id', pa.string())]),
+        'compositions': pa.schema([
+            ('recipe_id', pa.int64()), ('material_id', pa.int64()), ('composition_id', pa.int64()),
+            ('formula', pa.string()), ('amount', pa.string())]),
+        'element_amounts': pa.schema([
+            ('recipe_id', pa.int64()), ('material_id', pa.int64()), ('composition_id', pa.int64()),
+            ('role', pa.string()), ('element', pa.string()), ('amount', pa.string()),
+            ('amount_value', pa.float64())]),  # null if amount is not a number, e.g. "1-x"
+        'operations': pa.schema([
+            ('recipe_id', pa.int64()), ('operation_id', pa.int64()), ('type', pa.string()),
+            ('string', pa.string()), ('has_conditions', pa.bool_()),
+            ('has_temperature', pa.bool_()), ('has_time', pa.bool_()),  # false if list is None
+            ('atmosphere', strings), ('mixing_device', pa.string()), ('mixing_media', pa.string())]),
+        'condition_values': pa.schema([
+            ('recipe_id', pa.int64()), ('operation_id', pa.int64()), ('kind', pa.string()),
+            ('min_value', pa.float64()), ('max_value', pa.float64()), ('values', pa.list_(pa.float64())),
+            ('units', pa.string())]),
+        'quantities': pa.schema([
+            ('recipe_id', pa.int64()), ('quantity_id', pa.int64()), ('material', pa.string())]),
+        'quantity_values': pa.schema([
+            ('recipe_id', pa.int64()), ('quantity_id', pa.int64()), ('number', pa.float64()),
+            ('unit', pa.string())]),
+    }
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_json(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _from_json(value):
+    return None if value is None else json.loads(value)
+
+
+class _TableWriter:
+    """
+        buffers rows of one table and writes them as parquet row groups
+    """
+    def __init__(self, pa, path, schema, row_group_size):
+        self.pa = pa
+        self.schema = schema
+        self.columns = {name: [] for name in schema.names}
+        self.row_group_size = row_group_size
+        self.writer = pa.parquet.ParquetWriter(path, schema)
+
+    def append(self, *row):
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+        if len(self.columns['recipe_id']) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.columns['recipe_id']:
+            self.writer.write_table(self.pa.table(self.columns, schema=self.schema))
+            self.columns = {name: [] for name in self.schema.names}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def _add_material(writers, recipe_id, material_id, composition_id, role, material):
+    writers['materials'].append(
+        recipe_id, material_id, role, material.material_string, material.material_name,
+        material.material_formula, material.phase, material.is_acronym,
+        _to_json(material.amounts_vars), _to_json(material.elements_vars), material.additives,
+        material.oxygen_deficiency, material.mp_id)
+    for composition in material.composition or []:
+        writers['compositions'].append(recipe_id, material_id, composition_id, composition.formula,
+                                       composition.amount)
+        for element, amount in (composition.elements or {}).items():
+            writers['element_amounts'].append(recipe_id, material_id, composition_id, role, element, amount,
+                                              _to_float(amount))
+        composition_id += 1
+    return composition_id
+
+
+def export_parquet(entries, output_folder, row_group_size=100000):
+    """
+        writes ReactionEntry records into parquet tables
+    :param entries: iterable of ReactionEntry, e.g. dataset_reader.read_dataset()
+    :param output_folder: folder for <table>.parquet files
+    :param row_group_size: number of rows buffered per table before writing
+    :return: number of exported recipes
+    """
+    pa = _import_pyarrow()
+    os.makedirs(output_folder, exist_ok=True)
+    writers = {name: _TableWriter(pa, os.path.join(output_folder, name + '.parquet'), schema, row_group_size)
+               for name, schema in _schemas(pa).items()}
+
+    material_id = composition_id = operation_id = quantity_id = 0
+    n_recipes = 0
+    try:
+        for recipe_id, entry in enumerate(entries):
+            reaction = entry.reaction
+            writers['recipes'].append(
+                recipe_id, entry.doi, entry.paragraph_string,
+                _to_json(None if reaction is None else {'left_side': reaction.left_side,
+                                                        'right_side': reaction.right_side}),
+                entry.reaction_string, entry.targets_string, entry.solvents_string, entry.type)
+
+            materials = ([('target', entry.target)] if entry.target is not None else []) + \
+                [('precursor', precursor) for precursor in entry.precursors or []]
+            for role, material in materials:
+                composition_id = _add_material(writers, recipe_id, material_id, composition_id, role, material)
+                material_id += 1
+
+            for operation in entry.operations or []:
+                conditions = operation.conditions
+                if conditions is None:
+                    writers['operations'].append(recipe_id, operation_id, operation.type, operation.string,
+                                                 False, False, False, None, None, None)
+                else:
+                    writers['operations'].append(
+                        recipe_id, operation_id, operation.type, operation.string, True,
+                        conditions.temperature is not None, conditions.time is not None, conditions.atmosphere,
+                        conditions.mixing_device, conditions.mixing_media)
+                    for kind in CONDITION_KINDS:
+                        for value in getattr(conditions, kind) or []:
+                            writers['condition_values'].append(recipe_id, operation_id, kind, value.min_value,
+                                                               value.max_value, value.values, value.units)
+                operation_id += 1
+
+            for quantity in entry.quantities or []:
+                writers['quantities'].append(recipe_id, quantity_id, quantity.material)
+                for value in quantity.quantity or []:
+                    writers['quantity_values'].append(recipe_id, quantity_id, value.number, value.unit)
+                quantity_id += 1
+            n_recipes += 1
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return n_recipes
+
+
+def load_tables(folder, tables=TABLES, columns=None):
+    """
+        reads exported tables for vectorized analysis
+    :param folder: folder written by export_parquet()
+    :param tables: names of tables to read
+    :param columns: dict {table: list of columns}, all columns of tables missing in it are read
+    :return: dict {table: pyarrow.Table}
+    """
+    pa = _import_pyarrow()
+    columns = columns or {}
+    return {name: pa.parquet.read_table(os.path.join(folder, name + '.parquet'), columns=columns.get(name))
+            for name in tables}
+
+
+def _group(table, key):
+    rows = defaultdict(list)
+    for row in table.to_pylist():
+        rows[row[key]].append(row)
+    return rows
+
+
+def read_parquet(folder):
+    """
+        reassembles ReactionEntry records from tables written by export_parquet()
+    :param folder: folder written by export_parquet()
+    :return: generator of ReactionEntry, in export order
+    """
+    tables = load_tables(folder)
+    materials = _group(tables['materials'], 'recipe_id')
+    compositions = _group(tables['compositions'], 'material_id')
+    elements = _group(tables['element_amounts'], 'composition_id')
+    operations = _group(tables['operations'], 'recipe_id')
+    condition_values = _group(tables['condition_values'], 'operation_id')
+    quantities = _group(tables['quantities'], 'recipe_id')
+    quantity_values = _group(tables['quantity_values'], 'quantity_id')
+
+    def make_material(row):
+        return Material(
+            material_string=row['material_string'], material_name=row['material_name'],
+            material_formula=row['material_formula'], phase=row['phase'], is_acronym=row['is_acronym'],
+            composition=[Material.Composition(formula=c['formula'], amount=c['amount'],
+                                              elements={e['element']: e['amount']
+                                                        for e in elements[c['composition_id']]})
+                         for c in compositions[row['material_id']]],
+            amounts_vars=_from_json(row['amounts_vars']), elements_vars=_from_json(row['elements_vars']),
+            additives=row['additives'], oxygen_deficiency=row['oxygen_deficiency'], mp_id=row['mp_id'])
+
+    def make_values(values, kind, present):
+        if not present:
+            return None
+        return [Operation.Conditions.Value(min_value=v['min_value'], max_value=v['max_value'],
+                                           values=v['values'], units=v['units'])
+                for v in values if v['kind'] == kind]
+
+    def make_operation(row):
+        conditions = None
+        if row['has_conditions']:
+            values = condition_values[row['operation_id']]
+            conditions = Operation.Conditions(
+                temperature=make_values(values, 'temperature', row['has_temperature']),
+                time=make_values(values, 'time', row['has_time']),
+                atmosphere=row['atmosphere'], mixing_device=row['mixing_device'],
+                mixing_media=row['mixing_media'])
+        return Operation(type=row['type'], conditions=conditions, string=row['string'])
+
+    for row in tables['recipes'].to_pylist():
+        recipe_id = row['recipe_id']
+        reaction = _from_json(row['reaction'])
+        recipe_materials = materials[recipe_id]
+        targets = [make_material(m) for m in recipe_materials if m['role'] == 'target']
+        yield ReactionEntry(
+            doi=row['doi'], paragraph_string=row['paragraph_string'],
+            reaction=None if reaction is None else Formula(**reaction),
+            reaction_string=row['reaction_string'],
+            target=targets[0] if targets else None,
+            targets_string=row['targets_string'],
+            precursors=[make_material(m) for m in recipe_materials if m['role'] == 'precursor'],
+            solvents_string=row['solvents_string'],
+            operations=[make_operation(o) for o in operations[recipe_id]],
+            quantities=[Quantity(material=q['material'],
+                                 quantity=[Quantity.QuantityValue(number=v['number'], unit=v['unit'])
+                                           for v in quantity_values[q['quantity_id']]])
+                        for q in quantities[recipe_id]],
+            type=row['type'])
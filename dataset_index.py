@@ -0,0 +1,196 @@
+"""
+Inverted index over the solution-synthesis dataset for faceted queries.
+
+Every facet maps a key to the sorted uint32 array of ids of recipes
+(positions in the dataset) that have it:
+
+    target_element      elements of the target
+    precursor_element   elements of the precursors
+    precursor_formula   formulas of the precursors
+    precursor_anion     anions of the precursors (see precursor_anions())
+    operation_type      types of the operations
+
+    python dataset_index.py solution-synthesis_dataset_2021-8-5.json dataset_index.npz
+
+    from dataset_index import RecipeIndex
+
+    index = RecipeIndex.load("dataset_index.npz")
+    recipe_ids = index.query(target_element="Fe", precursor_anion="NO3")
+"""
+import argparse
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from dataset_reader import read_raw
+
+__all__ = ['FACETS', 'ANIONS', 'precursor_anions', 'RecipeIndex']
+
+FACETS = ('target_element', 'precursor_element', 'precursor_formula', 'precursor_anion', 'operation_type')
+
+# anions of data_analysis.ipynb
+M_ANIONS = ['H2PO4', 'HPO4', 'HCO3', 'HSO4', 'HSO3', 'C2O4']
+D_ANIONS = ['CO3', 'PO4', 'PO3', 'OH', 'NH4', 'NO3', 'NO2', 'SO4', 'SO3', 'CN']
+S_ANIONS = ['O', 'N', 'C', 'F', 'S', 'B', 'P']
+ANIONS = M_ANIONS + D_ANIONS + S_ANIONS + ['Cl', 'Ac']
+
+_ANIONS_SET = set(ANIONS)
+_FORMULA_ANIONS_RE = re.compile('|'.join(M_ANIONS + D_ANIONS))
+
+
+def precursor_anions(precursor):
+    """
+        anions of precursor: species of the composition that are in ANIONS, or, for compositions without species,
+        polyatomic anions found in the formula; acetate (CH3COO) is reported as "Ac".
+        This is a simplified version of the classification in data_analysis.ipynb
+    :param precursor: dict of precursor material
+    :return: set of anions
+    """
+    anions = set()
+    for composition in precursor.get('composition') or []:
+        formula = composition.get('formula') or ''
+        if 'CH3COO' in formula:
+            anions.add('Ac')
+            formula = formula.replace('CH3COO', '')
+        species = composition.get('species')
+        if species:
+            anions.update(s if s != 'CH3COO' else 'Ac' for s in species if s in _ANIONS_SET or s == 'CH3COO')
+        else:
+            # acid anions are listed first, so HCO3 is not counted as CO3
+            anions.update(_FORMULA_ANIONS_RE.findall(formula))
+    return anions
+
+
+def _material_elements(material):
+    return {element for composition in material.get('composition') or [] for element in composition['elements']}
+
+
+def _recipe_keys(recipe):
+    target = recipe.get('target') or {}
+    precursors = recipe.get('precursors') or []
+    return {
+        'target_element': _material_elements(target),
+        'precursor_element': set().union(*map(_material_elements, precursors)),
+        'precursor_formula': {p['material_formula'] for p in precursors if p.get('material_formula')},
+        'precursor_anion': set().union(*map(precursor_anions, precursors)),
+        'operation_type': {o['type'] for o in recipe.get('operations') or [] if o.get('type')},
+    }
+
+
+class RecipeIndex:
+    def __init__(self, postings, n_recipes):
+        """
+        Inverted index, use RecipeIndex.build() or RecipeIndex.load() to create
+        :param postings: dict {facet: dict {key: sorted np.uint32 array of recipe ids}}
+        :param n_recipes: number of indexed recipes
+        """
+        self.postings = postings
+        self.n_recipes = n_recipes
+
+    @classmethod
+    def build(cls, recipes):
+        """
+        :param recipes: iterable of dataset records as dicts, e.g. dataset_reader.read_raw();
+            recipe id is the position in the iterable
+        :return: RecipeIndex
+        """
+        postings = {facet: defaultdict(list) for facet in FACETS}
+        n_recipes = 0
+        for recipe_id, recipe in enumerate(recipes):
+            for facet, keys in _recipe_keys(recipe).items():
+                facet_postings = postings[facet]
+                for key in keys:
+                    facet_postings[key].append(recipe_id)
+            n_recipes += 1
+
+        return cls({facet: {key: np.array(ids, dtype=np.uint32) for key, ids in facet_postings.items()}
+                    for facet, facet_postings in postings.items()}, n_recipes)
+
+    def save(self, path):
+        """
+            writes index into compressed npz file, every facet is stored as keys, offsets and concatenated ids
+        :param path: output file
+        """
+        arrays = {'n_recipes': np.array(self.n_recipes, dtype=np.int64)}
+        for facet, facet_postings in self.postings.items():
+            keys = sorted(facet_postings)
+            lengths = [len(facet_postings[key]) for key in keys]
+            arrays[facet + '.keys'] = np.array(keys, dtype=str)
+            arrays[facet + '.offsets'] = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+            arrays[facet + '.ids'] = (np.concatenate([facet_postings[key] for key in keys]) if keys
+                                      else np.zeros(0, dtype=np.uint32))
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: file written by save()
+        :return: RecipeIndex
+        """
+        with np.load(path, allow_pickle=False) as data:
+            postings = {}
+            for facet in FACETS:
+                keys = data[facet + '.keys']
+                offsets = data[facet + '.offsets']
+                ids = data[facet + '.ids']
+                postings[facet] = {str(key): ids[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)}
+            return cls(postings, int(data['n_recipes']))
+
+    def keys(self, facet):
+        return sorted(self.postings[facet])
+
+    def get(self, facet, key):
+        """
+        :return: sorted np.uint32 array of ids of recipes with key, empty if key is not indexed
+        """
+        return self.postings[facet].get(key, np.zeros(0, dtype=np.uint32))
+
+    def frequency(self, facet):
+        """
+        :return: dict {key: number of recipes with key}, most frequent first
+        """
+        counts = {key: len(ids) for key, ids in self.postings[facet].items()}
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def union(self, facet, keys):
+        """
+        :return: sorted ids of recipes that have any of keys
+        """
+        arrays = [self.get(facet, key) for key in keys]
+        return np.unique(np.concatenate(arrays)) if arrays else np.zeros(0, dtype=np.uint32)
+
+    def query(self, **facets):
+        """
+            ids of recipes that match all conditions, e.g. query(target_element="Fe", precursor_anion=["NO3", "OH"])
+        :param facets: facet=key or facet=list of keys, every key is required
+        :return: sorted np.uint32 array of recipe ids, all recipes if no condition is given
+        """
+        arrays = []
+        for facet, keys in facets.items():
+            if facet not in self.postings:
+                raise ValueError('Unknown facet %r, should be one of %s' % (facet, ', '.join(FACETS)))
+            for key in [keys] if isinstance(keys, str) else keys:
+                arrays.append(self.get(facet, key))
+
+        if not arrays:
+            return np.arange(self.n_recipes, dtype=np.uint32)
+
+        arrays.sort(key=len)
+        result = arrays[0].copy()
+        for ids in arrays[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Builds inverted index of the dataset JSON dump')
+    parser.add_argument('dataset', help='dataset JSON dump')
+    parser.add_argument('output', help='output .npz file')
+    args = parser.parse_args()
+
+    index = RecipeIndex.build(read_raw(args.dataset))
+    index.save(args.output)
+    print('Indexed %i recipes' % index.n_recipes)
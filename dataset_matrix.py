@@ -0,0 +1,199 @@
+"""
+Sparse element-composition matrices of targets and precursors of the
+solution-synthesis dataset.
+
+Element amounts are parsed once into scipy CSR matrices (rows are
+materials, columns are ELEMENTS, all elements of the periodic table by
+atomic number). Every element of a composition is stored, also with
+amount 0, and amounts that are not numbers, e.g. "1-x", are stored in a
+separate boolean matrix, so presence of an element is always known:
+
+    from dataset_reader import read_raw
+    from dataset_matrix import ELEMENTS, build_matrices, element_frequency, cooccurrence
+
+    matrices = build_matrices(read_raw("solution-synthesis_dataset_2021-8-5.json"))
+    matrices["target"].save("target_matrix.npz")
+    target_element_frequency = dict(zip(ELEMENTS, element_frequency(matrices["target"])))
+    target_precursor_elements = cooccurrence(matrices["target"], matrices["precursor"])
+
+Requires scipy and find_solution_reaction (for the periodic table).
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from find_solution_reaction.periodic_table import PT_BY_NUMBER
+
+__all__ = ['ELEMENTS', 'ElementMatrix', 'build_matrices', 'element_frequency', 'cooccurrence',
+           'cosine_similarity']
+
+ELEMENTS = [element['symbol'] for element in PT_BY_NUMBER[1:]]
+
+ELEMENT_COLUMNS = {element: i for i, element in enumerate(ELEMENTS)}
+
+
+class ElementMatrix:
+    def __init__(self, amounts, symbolic, recipe_ids, n_recipes):
+        """
+        Materials x ELEMENTS matrices, use build_matrices() or ElementMatrix.load() to create
+        :param amounts: scipy CSR float matrix of numeric element amounts (multiplied by composition amount),
+            present elements are stored entries, also if the amount is 0
+        :param symbolic: scipy CSR bool matrix, True where amount is present but not a number
+        :param recipe_ids: np.array of recipe id of every row
+        :param n_recipes: number of recipes
+        """
+        self.amounts = amounts
+        self.symbolic = symbolic
+        self.recipe_ids = recipe_ids
+        self.n_recipes = n_recipes
+
+    @property
+    def presence(self):
+        """
+            scipy CSR bool matrix, True where element is present in material
+        """
+        amounts = self.amounts
+        stored = sp.csr_matrix((np.ones(len(amounts.data), dtype=bool), amounts.indices, amounts.indptr),
+                               shape=amounts.shape)
+        return stored + self.symbolic
+
+    def by_recipe(self, matrix=None):
+        """
+            sums rows of the same recipe
+        :param matrix: matrix with rows of this ElementMatrix, presence if None
+        :return: scipy CSR matrix n_recipes x columns
+        """
+        matrix = self.presence if matrix is None else matrix
+        rows = sp.csr_matrix((np.ones(len(self.recipe_ids)), (self.recipe_ids, np.arange(len(self.recipe_ids)))),
+                             shape=(self.n_recipes, len(self.recipe_ids)))
+        return (rows @ matrix.astype(np.float64)).tocsr()
+
+    def save(self, path):
+        """
+        :param path: output .npz file
+        """
+        arrays = {'recipe_ids': self.recipe_ids, 'n_recipes': np.array(self.n_recipes),
+                  'elements': np.array(ELEMENTS)}
+        for name, matrix in (('amounts', self.amounts), ('symbolic', self.symbolic)):
+            arrays[name + '.data'] = matrix.data
+            arrays[name + '.indices'] = matrix.indices
+            arrays[name + '.indptr'] = matrix.indptr
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: file written by save()
+        :return: ElementMatrix
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if list(data['elements']) != ELEMENTS:
+                raise ValueError('%s has different element columns' % path)
+            shape = (len(data['recipe_ids']), len(ELEMENTS))
+            matrices = [sp.csr_matrix((data[name + '.data'], data[name + '.indices'], data[name + '.indptr']),
+                                      shape=shape)
+                        for name in ('amounts', 'symbolic')]
+            return cls(matrices[0], matrices[1], data['recipe_ids'], int(data['n_recipes']))
+
+
+def _to_float(amount):
+    try:
+        return float(amount)
+    except (TypeError, ValueError):
+        return None
+
+
+class _MatrixBuilder:
+    def __init__(self):
+        self.rows = []
+        self.amounts = ([], [], [])  # data, row, column
+        self.symbolic = ([], [])  # row, column
+
+    def add(self, recipe_id, material):
+        row = len(self.rows)
+        self.rows.append(recipe_id)
+        for composition in material.get('composition') or []:
+            fraction = _to_float(composition.get('amount'))
+            for element, amount in composition['elements'].items():
+                column = ELEMENT_COLUMNS.get(element)
+                if column is None:
+                    # element variables, e.g. "M"
+                    continue
+                amount = _to_float(amount)
+                if fraction is None or amount is None:
+                    self.symbolic[0].append(row)
+                    self.symbolic[1].append(column)
+                else:
+                    self.amounts[0].append(fraction * amount)
+                    self.amounts[1].append(row)
+                    self.amounts[2].append(column)
+
+    def build(self, n_recipes):
+        shape = (len(self.rows), len(ELEMENTS))
+        # duplicated entries (element in several compositions) are summed, zeros stay stored entries
+        amounts = sp.csr_matrix((np.array(self.amounts[0], dtype=np.float64),
+                                 (np.array(self.amounts[1], dtype=np.int64),
+                                  np.array(self.amounts[2], dtype=np.int64))), shape=shape)
+        symbolic = sp.csr_matrix((np.ones(len(self.symbolic[0]), dtype=bool),
+                                  (np.array(self.symbolic[0], dtype=np.int64),
+                                   np.array(self.symbolic[1], dtype=np.int64))), shape=shape)
+        return ElementMatrix(amounts, symbolic, np.array(self.rows, dtype=np.int64), n_recipes)
+
+
+def build_matrices(recipes):
+    """
+        parses element amounts of targets and precursors
+    :param recipes: iterable of dataset records as dicts, e.g. dataset_reader.read_raw();
+        recipe id is the position in the iterable
+    :return: dict {"target": ElementMatrix, "precursor": ElementMatrix}, target matrix has one row per recipe
+    """
+    targets = _MatrixBuilder()
+    precursors = _MatrixBuilder()
+    n_recipes = 0
+    for recipe_id, recipe in enumerate(recipes):
+        targets.add(recipe_id, recipe.get('target') or {})
+        for precursor in recipe.get('precursors') or []:
+            precursors.add(recipe_id, precursor)
+        n_recipes += 1
+    return {'target': targets.build(n_recipes), 'precursor': precursors.build(n_recipes)}
+
+
+def element_frequency(matrix, by_recipe=False):
+    """
+    :param matrix: ElementMatrix
+    :param by_recipe: count recipes instead of materials
+    :return: np.array of number of materials (recipes) with every element of ELEMENTS
+    """
+    presence = matrix.presence
+    if by_recipe:
+        presence = matrix.by_recipe(presence) > 0
+    return np.asarray(presence.sum(axis=0)).ravel()
+
+
+def cooccurrence(matrix, other=None):
+    """
+        number of recipes where element i (in matrix) and element j (in other) occur together
+    :param matrix: ElementMatrix
+    :param other: ElementMatrix, same as matrix if None
+    :return: np.array len(ELEMENTS) x len(ELEMENTS)
+    """
+    left = (matrix.by_recipe() > 0).astype(np.float64)
+    right = left if other is None else (other.by_recipe() > 0).astype(np.float64)
+    return (left.T @ right).toarray()
+
+
+def cosine_similarity(matrix, rows=None, binary=False):
+    """
+        cosine similarity of compositions of materials
+    :param matrix: ElementMatrix
+    :param rows: list of row numbers to compare with all rows, all rows if None
+    :param binary: compare presence of elements instead of amounts
+    :return: np.array len(rows) x rows of matrix if rows are given, otherwise scipy CSR matrix rows x rows
+    """
+    x = matrix.presence.astype(np.float64) if binary else matrix.amounts
+    norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    x = sp.diags(1.0 / norms) @ x
+    x = x.tocsr()
+    if rows is None:
+        return (x @ x.T).tocsr()
+    return (x[rows] @ x.T).toarray()
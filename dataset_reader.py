@@ -0,0 +1,125 @@
+"""
+Streaming reader of the solution-synthesis dataset dump into the typed
+records of dataset_typing.
+
+    from dataset_reader import read_dataset
+
+    for entry in read_dataset("solution-synthesis_dataset_2021-8-5.json",
+                              fields=["doi", "target.composition"]):
+        print(entry.doi, entry.target.composition[0].elements)
+
+Fields are dotted paths into ReactionEntry. A path into a list field
+(precursors, operations, quantities, composition, ...) applies to every
+item of the list. Fields that are not requested are None and are never
+converted into typed records.
+
+Projection saves only the conversion into typed records: every record
+is still parsed completely by ijson (one record at a time), including
+fields that are not requested, such as paragraph strings and operations.
+Skipping them in the ijson event stream is slower than letting the C
+backend build the whole record, because every event then passes through
+Python. For repeated narrow reads, use the binary cache (dataset_binary)
+or the Parquet export (dataset_columnar), which read only what is asked.
+"""
+import ijson
+
+from dataset_typing import Formula, Material, Operation, Quantity, ReactionEntry
+
+__all__ = ['read_dataset', 'read_raw', 'to_entry', 'parse_fields']
+
+# Record types of the fields that are records themselves (or lists of them)
+_NESTED = {
+    ReactionEntry: {'reaction': Formula, 'target': Material, 'precursors': Material,
+                    'operations': Operation, 'quantities': Quantity},
+    Material: {'composition': Material.Composition},
+    Operation: {'conditions': Operation.Conditions},
+    Operation.Conditions: {'temperature': Operation.Conditions.Value, 'time': Operation.Conditions.Value},
+    Quantity: {'quantity': Quantity.QuantityValue},
+}
+
+
+def parse_fields(fields, record_type=ReactionEntry):
+    """
+        converts list of dotted field paths into projection tree
+    :param fields: list of paths, e.g. ["doi", "target.composition", "operations.type"], None for all fields
+    :param record_type: record type the paths start from
+    :return: dict {field: subtree}, subtree is None if the whole field is requested; None for all fields
+    """
+    if fields is None:
+        return None
+
+    tree = {}
+    for path in fields:
+        node, node_type = tree, record_type
+        names = path.split('.')
+        for i, name in enumerate(names):
+            if name not in node_type._fields:
+                raise ValueError('Unknown field %r in %r' % (name, path))
+            if i == len(names) - 1:
+                node[name] = None
+                break
+            if name not in _NESTED.get(node_type, {}):
+                raise ValueError('Field %r in %r has no sub-fields' % (name, path))
+            if name in node and node[name] is None:
+                # whole field is already requested
+                break
+            node = node.setdefault(name, {})
+            node_type = _NESTED[node_type][name]
+    return tree
+
+
+def _build(record_type, raw, tree):
+    nested = _NESTED.get(record_type, {})
+    values = []
+    for name in record_type._fields:
+        if tree is not None and name not in tree:
+            values.append(None)
+            continue
+
+        value = raw.get(name)
+        if value is not None and name in nested:
+            sub_tree = tree[name] if tree is not None else None
+            if isinstance(value, list):
+                value = [_build(nested[name], item, sub_tree) for item in value]
+            else:
+                value = _build(nested[name], value, sub_tree)
+        values.append(value)
+    return record_type(*values)
+
+
+def to_entry(raw, fields=None):
+    """
+        converts dataset record into ReactionEntry
+    :param raw: dict of dataset record
+    :param fields: list of dotted field paths or projection tree from parse_fields(), None for all fields
+    :return: ReactionEntry, fields that are not requested are None
+    """
+    tree = parse_fields(fields) if isinstance(fields, (list, tuple)) else fields
+    return _build(ReactionEntry, raw, tree)
+
+
+def read_raw(path):
+    """
+        streams dataset records as dicts
+    :param path: path to dataset JSON dump or binary file object
+    :return: generator of dict
+    """
+    if hasattr(path, 'read'):
+        yield from ijson.items(path, 'item', use_float=True)
+        return
+
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def read_dataset(path, fields=None):
+    """
+        streams dataset records as ReactionEntry
+        every record is parsed completely, fields only limit conversion into typed records
+    :param path: path to dataset JSON dump or binary file object
+    :param fields: list of dotted field paths to convert, None for all fields
+    :return: generator of ReactionEntry
+    """
+    tree = parse_fields(fields)
+    for raw in read_raw(path):
+        yield _build(ReactionEntry, raw, tree)